@@ -5,7 +5,7 @@ from typing import Any, Dict, Optional, Union
 from .statsig_metadata import _StatsigMetadata
 from .config_evaluation import _ConfigEvaluation
 from .statsig_user import StatsigUser
-from .spec_store import _SpecStore
+from .spec_store import _SpecSnapshot
 from .utils import HashingAlgorithm, djb2_hash
 
 
@@ -26,21 +26,21 @@ class ClientInitializeResponseFormatter:
     @staticmethod
     def get_formatted_response(
             eval_func, user: StatsigUser,
-            spec_store: _SpecStore,
+            specs: _SpecSnapshot,
             evaluator,
             hash_algo: HashingAlgorithm,
             client_sdk_key=None,
             include_local_override=False
     ) -> ClientInitializeResponse:
         def config_to_response(config_name, config_spec):
-            target_app_id = spec_store.get_target_app_for_sdk_key(client_sdk_key)
-            config_target_apps = config_spec.get("targetAppIDs", [])
+            target_app_id = specs.get_target_app_for_sdk_key(client_sdk_key)
+            config_target_apps = config_spec.target_app_ids
             if target_app_id is not None and target_app_id not in config_target_apps:
                 return None
 
             eval_result = _ConfigEvaluation()
             local_override = None
-            category = config_spec["type"]
+            category = config_spec.type
             if include_local_override:
                 if category == "feature_gate":
                     local_override = evaluator.lookup_gate_override(user, config_name)
@@ -50,7 +50,7 @@ class ClientInitializeResponseFormatter:
             if local_override is not None:
                 eval_result = local_override
             else:
-                eval_func(user, config_spec, eval_result)
+                eval_func(config_spec, eval_result)
 
             if eval_result is None:
                 return None
@@ -63,8 +63,8 @@ class ClientInitializeResponseFormatter:
                 "value": False
             }
 
-            category = config_spec["type"]
-            entity_type = config_spec["entity"]
+            category = config_spec.type
+            entity_type = config_spec.entity
 
             if category == "feature_gate":
                 if entity_type in ("segment", "holdout"):
@@ -72,15 +72,14 @@ class ClientInitializeResponseFormatter:
 
                 result["value"] = eval_result.boolean_value
             elif category == "dynamic_config":
-                id_type = config_spec["idType"]
+                id_type = config_spec.id_type
                 result["value"] = eval_result.json_value
                 result["group"] = eval_result.rule_id
                 result["is_device_based"] = id_type.lower(
                 ) == "stableid" if isinstance(id_type, str) else False
 
                 if entity_type == "experiment":
-                    populate_experiment_fields(
-                        config_name, config_spec, eval_result, result)
+                    populate_experiment_fields(config_spec, eval_result, result)
                 elif entity_type == "layer":
                     populate_layer_fields(config_spec, eval_result, result, hash_algo)
 
@@ -89,55 +88,45 @@ class ClientInitializeResponseFormatter:
 
             return hashed_name, result
 
-        def populate_experiment_fields(
-                config_name: str, config_spec, eval_result, result: dict):
+        def populate_experiment_fields(config_spec, eval_result, result: dict):
             result["is_user_in_experiment"] = eval_result.is_experiment_group
-            result["is_experiment_active"] = config_spec.get(
-                'isActive', False) is True
+            result["is_experiment_active"] = config_spec.is_active
 
-            if not config_spec.get('hasSharedParams', False):
+            if not config_spec.has_shared_params:
                 return
 
             result["is_in_layer"] = True
-            result["explicit_parameters"] = config_spec.get(
-                "explicitParameters", [])
+            result["explicit_parameters"] = config_spec.explicit_parameters
 
-            layer_name = spec_store.get_layer_name_for_experiment(config_name)
-            if layer_name is None or spec_store.get_layer(layer_name) is None:
-                return
-
-            layer = spec_store.get_layer(layer_name)
+            layer = config_spec.layer
             if layer is None:
                 return
 
-            layer_value = layer.get("defaultValue", {})
+            layer_value = layer.default_value
             current_value = result.get("value", {})
             result["value"] = {**layer_value, **current_value}
 
         def populate_layer_fields(config_spec, eval_result, result, hash_algo):
             delegate = eval_result.allocated_experiment
-            result["explicit_parameters"] = config_spec.get(
-                "explicitParameters", [])
+            result["explicit_parameters"] = config_spec.explicit_parameters
 
             if delegate is not None and delegate != "":
-                delegate_spec = spec_store.get_config(delegate)
+                delegate_spec = specs.get_config(delegate)
                 delegate_result = _ConfigEvaluation()
-                eval_func(user, delegate_spec, delegate_result)
+                eval_func(delegate_spec, delegate_result)
 
                 if delegate_spec is not None:
                     result["allocated_experiment_name"] = hash_name(delegate, hash_algo)
                     result["is_user_in_experiment"] = delegate_result.is_experiment_group
-                    result["is_experiment_active"] = delegate_spec.get(
-                        "isActive", False) is True
-                    result["explicit_parameters"] = delegate_spec.get(
-                        "explicitParameters", [])
+                    result["is_experiment_active"] = delegate_spec.is_active
+                    result["explicit_parameters"] = delegate_spec.explicit_parameters
 
-            result["undelegated_secondary_exposures"] = eval_result.undelegated_secondary_exposures or []
+            result["undelegated_secondary_exposures"] = hash_exposures(
+                eval_result.undelegated_secondary_exposures or [], hash_algo)
 
         def hash_exposures(exposures: list, algo: HashingAlgorithm):
-            for exposure in exposures:
-                exposure['gate'] = hash_name(exposure['gate'], algo)
-            return exposures
+            # exposure dicts can be shared between results, so hash into copies
+            return [{**exposure, "gate": hash_name(exposure["gate"], algo)} for exposure in exposures]
 
         def filter_nones(arr):
             return dict([i for i in arr if i is not None])
@@ -157,14 +146,14 @@ class ClientInitializeResponseFormatter:
         meta = _StatsigMetadata.get()
 
         return {
-            "feature_gates": filter_nones(map(map_fnc, spec_store.get_all_gates().items())),
-            "dynamic_configs": filter_nones(map(map_fnc, spec_store.get_all_configs().items())),
-            "layer_configs": filter_nones(map(map_fnc, spec_store.get_all_layers().items())),
+            "feature_gates": filter_nones(map(map_fnc, specs.get_all_gates().items())),
+            "dynamic_configs": filter_nones(map(map_fnc, specs.get_all_configs().items())),
+            "layer_configs": filter_nones(map(map_fnc, specs.get_all_layers().items())),
             "sdkParams": {},
             "has_updates": True,
             "generator": "statsig-python-sdk",
             "evaluated_keys": evaluated_keys,
-            "time": spec_store.last_update_time,
+            "time": specs.last_update_time,
             "user": user.to_dict(),
             "hash_used": hash_algo.value,
             "sdkInfo": {
@@ -1,7 +1,17 @@
 from .evaluation_details import EvaluationDetails, EvaluationReason
 
+# placeholder until the evaluation sets its own details
+_UNEVALUATED_DETAILS = EvaluationDetails(0, 0, EvaluationReason.unrecognized, 0)
+
+# shared by every result without exposures or explicit parameters, so it is never appended
+# to; own_secondary_exposures swaps in a list of the result's own first
+_EMPTY: list = []
+
 
 class _ConfigEvaluation:
+    __slots__ = ("boolean_value", "json_value", "rule_id", "secondary_exposures", "undelegated_secondary_exposures",
+                 "allocated_experiment", "explicit_parameters", "is_experiment_group", "evaluation_details",
+                 "group_name")
 
     def __init__(self,
                  boolean_value=False,
@@ -23,15 +33,25 @@ class _ConfigEvaluation:
             rule_id = ""
         self.rule_id = rule_id
         if secondary_exposures is None:
-            secondary_exposures = []
+            secondary_exposures = _EMPTY
         if explicit_parameters is None:
-            explicit_parameters = []
+            explicit_parameters = _EMPTY
         self.secondary_exposures = secondary_exposures
         self.undelegated_secondary_exposures = self.secondary_exposures
         self.allocated_experiment = allocated_experiment
         self.explicit_parameters = explicit_parameters
         self.is_experiment_group = is_experiment_group is True
         if evaluation_details is None:
-            evaluation_details = EvaluationDetails(0, 0, EvaluationReason.unrecognized)
+            evaluation_details = _UNEVALUATED_DETAILS
         self.evaluation_details = evaluation_details
         self.group_name = group_name
+
+    def own_secondary_exposures(self) -> list:
+        """Returns secondary_exposures as a list that can be appended to"""
+        exposures = self.secondary_exposures
+        if exposures is _EMPTY:
+            exposures = []
+            if self.undelegated_secondary_exposures is _EMPTY:
+                self.undelegated_secondary_exposures = exposures
+            self.secondary_exposures = exposures
+        return exposures
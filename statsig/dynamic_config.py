@@ -1,4 +1,6 @@
 class DynamicConfig:
+    __slots__ = ("value", "name", "rule_id", "group_name", "evaluation_details")
+
     def __init__(self, data, name, rule, group_name=None, evaluation_details=None):
         if data is None:
             data = {}
@@ -0,0 +1,64 @@
+import time
+from typing import Dict, List, Optional
+
+from .evaluation_details import EvaluationDetails
+from .spec_store import _SpecSnapshot
+from .statsig_user import StatsigUser
+
+
+class _NestedGateResult:
+    """What evaluating a gate as a PASS_GATE/FAIL_GATE dependency wrote onto the parent result"""
+
+    def __init__(self, end_result, exposures: List[dict]):
+        self.boolean_value = end_result.boolean_value
+        self.json_value = end_result.json_value
+        self.group_name = end_result.group_name
+        self.is_experiment_group = end_result.is_experiment_group
+        self.rule_id = end_result.rule_id
+        self.evaluation_details = end_result.evaluation_details
+        self.exposures = exposures
+
+    def apply_to(self, end_result):
+        end_result.boolean_value = self.boolean_value
+        end_result.json_value = self.json_value
+        end_result.group_name = self.group_name
+        end_result.is_experiment_group = self.is_experiment_group
+        end_result.rule_id = self.rule_id
+        end_result.evaluation_details = self.evaluation_details
+        if self.exposures:
+            end_result.own_secondary_exposures().extend(self.exposures)
+
+
+class _EvaluationContext:
+    """State shared by everything evaluated for one top-level call.
+
+    A context belongs to a single user and reads specs from a single snapshot, pinned when
+    the evaluator first sees it, so a sync landing mid-call cannot mix specs from two
+    syncs. Nested gate results are memoized by gate name,
+    so a holdout or segment referenced many times is evaluated once per call. Bucketing
+    hashes are kept by their salted input and ID list digests by unit ID, so each is
+    computed once per call however many rules use it. Results are stamped with a single
+    server time for the call. Calls that will not log an exposure set track_exposures to
+    False and skip building secondary exposures altogether.
+    """
+
+    def __init__(self, user: StatsigUser, track_exposures: bool = True, specs: Optional[_SpecSnapshot] = None):
+        self.user = user
+        self.track_exposures = track_exposures
+        self.specs = specs
+        self.nested_gates: Dict[str, _NestedGateResult] = {}
+        self.user_hashes: Dict[str, int] = {}
+        self.id_list_digests: Dict[str, str] = {}
+        # specs flagged in_cycle that are being evaluated
+        self.evaluating: set = set()
+        self.server_time: Optional[int] = None
+        self.stamped_details: Dict[EvaluationDetails, EvaluationDetails] = {}
+
+    def stamp(self, details: EvaluationDetails) -> EvaluationDetails:
+        stamped = self.stamped_details.get(details)
+        if stamped is None:
+            if self.server_time is None:
+                self.server_time = round(time.time() * 1000)
+            stamped = details.with_server_time(self.server_time)
+            self.stamped_details[details] = stamped
+        return stamped
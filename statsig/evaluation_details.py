@@ -1,5 +1,6 @@
 import time
 from enum import Enum
+from typing import Optional
 
 
 class EvaluationReason(str, Enum):
@@ -14,14 +15,26 @@ class EvaluationReason(str, Enum):
 
 
 class EvaluationDetails:
+    """Why and from which config sync a result was evaluated.
+
+    Details are shared by every evaluation of the same reason and sync, so they are
+    never modified once built. The evaluator leaves server_time unset (0) on the shared
+    details and stamps it onto a copy once per top-level call.
+    """
+
+    __slots__ = ("reason", "config_sync_time", "init_time", "server_time")
+
     reason: EvaluationReason
     config_sync_time: int
     init_time: int
     server_time: int
 
     def __init__(self, config_sync_time: int, init_time: int,
-                 reason: EvaluationReason):
+                 reason: EvaluationReason, server_time: Optional[int] = None):
         self.config_sync_time = config_sync_time
         self.init_time = init_time
         self.reason = reason
-        self.server_time = round(time.time() * 1000)
+        self.server_time = round(time.time() * 1000) if server_time is None else server_time
+
+    def with_server_time(self, server_time: int):
+        return EvaluationDetails(self.config_sync_time, self.init_time, self.reason, server_time)
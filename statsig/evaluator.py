@@ -1,12 +1,9 @@
 import base64
-import bisect
-import functools
+import threading
 import time
-from datetime import datetime
-import re
 from hashlib import sha256
 from struct import unpack
-from typing import Dict
+from typing import Dict, Optional
 
 from ua_parser import user_agent_parser
 from ip3country import CountryLookup
@@ -14,18 +11,37 @@ from ip3country import CountryLookup
 from .statsig_user import StatsigUser
 from .client_initialize_formatter import ClientInitializeResponseFormatter
 from .evaluation_details import EvaluationDetails, EvaluationReason
-from .spec_store import _SpecStore
-from .config_evaluation import _ConfigEvaluation
-from .utils import HashingAlgorithm, binary_search
+from .spec_store import _SpecSnapshot, _SpecStore
+from .statsig_options import StatsigOptions, DEFAULT_USER_AGENT_CACHE_SIZE, DEFAULT_IP_COUNTRY_CACHE_SIZE
+from .config_evaluation import _ConfigEvaluation, _EMPTY
+from .evaluation_context import _EvaluationContext, _NestedGateResult
+from .lru_cache import _LRUCache
+from .spec_compiler import CONDITION_PUBLIC, CONDITION_PASS_GATE, CONDITION_FAIL_GATE, CONDITION_MULTI_PASS_GATE, \
+    CONDITION_MULTI_FAIL_GATE, CONDITION_IP_BASED, CONDITION_UA_BASED, CONDITION_USER_FIELD, CONDITION_CURRENT_TIME, \
+    CONDITION_ENVIRONMENT_FIELD, CONDITION_USER_BUCKET, CONDITION_UNIT_ID, OPERATOR_IN_SEGMENT_LIST, \
+    SEGMENT_LIST_OPERATORS, USER_BUCKET_COUNT, get_environment_field, user_field_getter
+from .utils import HashingAlgorithm
+
+_get_ip = user_field_getter("ip")
+_get_user_agent = user_field_getter("userAgent")
 
 class _Evaluator:
-    def __init__(self, spec_store: _SpecStore):
+    def __init__(self, spec_store: _SpecStore, options: Optional[StatsigOptions] = None):
         self._spec_store = spec_store
 
-        self._country_lookup = CountryLookup()
+        ua_cache_size = DEFAULT_USER_AGENT_CACHE_SIZE if options is None else options.user_agent_cache_size
+        self._user_agent_cache = _LRUCache(ua_cache_size)
+
+        # the country table is only loaded once an IP_BASED condition needs it
+        self._country_lookup: Optional[CountryLookup] = None
+        self._country_lookup_lock = threading.Lock()
+        ip_cache_size = DEFAULT_IP_COUNTRY_CACHE_SIZE if options is None else options.ip_country_cache_size
+        self._ip_country_cache = _LRUCache(ip_cache_size)
+        self._short_circuit_rules = options is not None and options.short_circuit_rules
         self._gate_overrides: Dict[str, dict] = {}
         self._config_overrides: Dict[str, dict] = {}
         self._layer_overrides: Dict[str, dict] = {}
+        self._evaluation_details: Dict[EvaluationReason, EvaluationDetails] = {}
 
     def override_gate(self, gate, value, user_id=None):
         gate_overrides = self._gate_overrides.get(gate)
@@ -78,6 +94,8 @@ class _Evaluator:
         self._layer_overrides = {}
 
     def clean_exposures(self, exposures):
+        if exposures is _EMPTY:
+            return exposures
         seen: Dict[str, bool] = {}
         result = []
         for exposure in exposures:
@@ -96,22 +114,33 @@ class _Evaluator:
             client_sdk_key=None,
             include_local_override=False,
     ):
-        if not self._spec_store.is_ready_for_checks():
+        specs = self._spec_store.get_snapshot()
+        if specs.last_update_time == 0:
             return None
 
-        if self._spec_store.last_update_time == 0:
-            return None
+        context = _EvaluationContext(user, specs=specs)
+
+        def eval_func(config, end_result):
+            self.__eval_config(context, config, end_result)
 
         return ClientInitializeResponseFormatter \
-            .get_formatted_response(self.__eval_config, user, self._spec_store, self, hash, client_sdk_key,
+            .get_formatted_response(eval_func, user, specs, self, hash, client_sdk_key,
                                     include_local_override)
 
-    def _create_evaluation_details(self, reason: EvaluationReason):
+    def _create_evaluation_details(self, reason: EvaluationReason, specs: Optional[_SpecSnapshot] = None):
         if reason == EvaluationReason.uninitialized:
-            return EvaluationDetails(0, 0, reason)
+            config_sync_time, init_time = 0, 0
+        else:
+            if specs is None:
+                specs = self._spec_store.get_snapshot()
+            config_sync_time, init_time = specs.last_update_time, self._spec_store.initial_update_time
 
-        return EvaluationDetails(
-            self._spec_store.last_update_time, self._spec_store.initial_update_time, reason)
+        # shared until the next sync, the top-level call stamps its server time on a copy
+        details = self._evaluation_details.get(reason)
+        if details is None or details.config_sync_time != config_sync_time or details.init_time != init_time:
+            details = EvaluationDetails(config_sync_time, init_time, reason, 0)
+            self._evaluation_details[reason] = details
+        return details
 
     def __lookup_gate_override(self, user, gate):
         gate_overrides = self._gate_overrides.get(gate)
@@ -183,34 +212,84 @@ class _Evaluator:
                     break
         return override
 
-    def unsupported_or_unrecognized(self, config_name):
-        if config_name in self._spec_store.unsupported_configs:
+    def unsupported_or_unrecognized(self, config_name, specs: Optional[_SpecSnapshot] = None):
+        if specs is None:
+            specs = self._spec_store.get_snapshot()
+        if config_name in specs.unsupported_configs:
             return _ConfigEvaluation(
                 evaluation_details=self._create_evaluation_details(
-                    EvaluationReason.unsupported))
+                    EvaluationReason.unsupported, specs))
         return _ConfigEvaluation(
             evaluation_details=self._create_evaluation_details(
-                EvaluationReason.unrecognized))
+                EvaluationReason.unrecognized, specs))
+
+    def __pinned(self, user, context):
+        if context is None:
+            return _EvaluationContext(user, specs=self._spec_store.get_snapshot())
+        if context.specs is None:
+            context.specs = self._spec_store.get_snapshot()
+        return context
+
+    def check_gate(self, user, gate, context: Optional[_EvaluationContext] = None):
+        context = self.__pinned(user, context)
+        return self.__stamped(context, self.__check_gate(context, gate))
+
+    def __stamped(self, context, result):
+        result.evaluation_details = context.stamp(result.evaluation_details)
+        return result
+
+    def __check_gate(self, context, gate):
+        eval_gate, result = self.__resolve_gate(context, gate)
+        if eval_gate is None:
+            return result
+        result = _ConfigEvaluation()
+        self.__eval_config(context, eval_gate, result)
+        return result
 
-    def check_gate(self, user, gate, end_result=None, is_nested=False):
-        override = self.__lookup_gate_override(user, gate)
+    def __resolve_gate(self, context, gate, eval_gate=None):
+        override = self.__lookup_gate_override(context.user, gate)
         if override is not None:
-            return override
+            return None, override
 
         if self._spec_store.init_reason == EvaluationReason.uninitialized:
-            return _ConfigEvaluation(
+            return None, _ConfigEvaluation(
                 evaluation_details=self._create_evaluation_details(
                     EvaluationReason.uninitialized))
-        eval_gate = self._spec_store.get_gate(gate)
         if eval_gate is None:
-            return self.unsupported_or_unrecognized(gate)
-        if end_result is None:
-            end_result = _ConfigEvaluation()
-        self.__eval_config(user, eval_gate, end_result, is_nested)
-        return end_result
+            eval_gate = context.specs.get_gate(gate)
+        if eval_gate is None:
+            return None, self.unsupported_or_unrecognized(gate, context.specs)
+        return eval_gate, None
+
+    def __check_nested_gate(self, context, gate, end_result, eval_gate=None):
+        memo = context.nested_gates.get(gate)
+        if memo is not None:
+            memo.apply_to(end_result)
+            return end_result
+
+        exposures = end_result.own_secondary_exposures() if context.track_exposures else _EMPTY
+        exposure_count = len(exposures)
+        eval_gate, result = self.__resolve_gate(context, gate, eval_gate)
+        if eval_gate is not None:
+            if eval_gate.has_dependencies:
+                yield self.__eval_config_steps(context, eval_gate, end_result, True)
+            else:
+                self.__eval_config(context, eval_gate, end_result, True)
+            result = end_result
+        # overrides and unrecognized gates come back as a separate result, errors can leave
+        # end_result half written and delegates replace the exposure list, so only a plain
+        # completed evaluation is replayable
+        if result is end_result and end_result.secondary_exposures is exposures \
+                and end_result.evaluation_details.reason != EvaluationReason.error:
+            context.nested_gates[gate] = _NestedGateResult(end_result, exposures[exposure_count:])
+        return result
+
+    def get_config(self, user, config, context: Optional[_EvaluationContext] = None):
+        context = self.__pinned(user, context)
+        return self.__stamped(context, self.__get_config(context, config))
 
-    def get_config(self, user, config):
-        override = self.__lookup_config_override(user, config)
+    def __get_config(self, context, config):
+        override = self.__lookup_config_override(context.user, config)
         if override is not None:
             return override
 
@@ -219,15 +298,19 @@ class _Evaluator:
                 evaluation_details=self._create_evaluation_details(
                     EvaluationReason.uninitialized))
 
-        eval_config = self._spec_store.get_config(config)
+        eval_config = context.specs.get_config(config)
         if eval_config is None:
-            return self.unsupported_or_unrecognized(config)
+            return self.unsupported_or_unrecognized(config, context.specs)
         result = _ConfigEvaluation()
-        self.__eval_config(user, eval_config, result)
+        self.__eval_config(context, eval_config, result)
         return result
 
-    def get_layer(self, user, layer):
-        override = self.__lookup_layer_override(user, layer)
+    def get_layer(self, user, layer, context: Optional[_EvaluationContext] = None):
+        context = self.__pinned(user, context)
+        return self.__stamped(context, self.__get_layer(context, layer))
+
+    def __get_layer(self, context, layer):
+        override = self.__lookup_layer_override(context.user, layer)
         if override is not None:
             return override
 
@@ -236,69 +319,124 @@ class _Evaluator:
                 evaluation_details=self._create_evaluation_details(
                     EvaluationReason.uninitialized))
 
-        eval_layer = self._spec_store.get_layer(layer)
+        eval_layer = context.specs.get_layer(layer)
         if eval_layer is None:
-            return self.unsupported_or_unrecognized(layer)
+            return self.unsupported_or_unrecognized(layer, context.specs)
         result = _ConfigEvaluation()
-        self.__eval_config(user, eval_layer, result)
+        self.__eval_config(context, eval_layer, result)
         return result
 
-    def __eval_config(self, user, config, end_result, is_nested=False):
+    # Evaluation that can reach another spec is written as generators that yield the nested
+    # gates they depend on instead of calling into them. __run keeps the evaluations in progress
+    # on an explicit stack, so dependency chains are not bounded by the interpreter's recursion
+    # limit, and resumes each one once the gate it yielded is done. Specs without dependencies
+    # never yield, so they are stepped through directly.
+    def __eval_config(self, context, config, end_result, is_nested=False):
+        steps = self.__eval_config_steps(context, config, end_result, is_nested)
+        if config is not None and config.has_dependencies:
+            self.__run(steps)
+        else:
+            next(steps, None)
+
+    def __run(self, steps):
+        stack = [steps]
+        error = None
+        while stack:
+            try:
+                if error is None:
+                    # steps only ever yield more steps, so None means they completed
+                    nested = next(stack[-1], None)
+                else:
+                    thrown, error = error, None
+                    nested = stack[-1].throw(thrown)
+            except StopIteration:
+                nested = None
+            except Exception as e:
+                # hand the failure to the evaluation that yielded the gate, as a raise would
+                stack.pop()
+                if not stack:
+                    raise
+                error = e
+                continue
+            if nested is None:
+                stack.pop()
+            else:
+                stack.append(nested)
+
+    def __eval_config_steps(self, context, config, end_result, is_nested=False):
         if config is None:
             end_result.evaluation_details = self._create_evaluation_details(
-                EvaluationReason.unrecognized)
+                EvaluationReason.unrecognized, context.specs)
             return
         try:
-            self.__evaluate(user, config, end_result, is_nested)
+            yield from self.__evaluate(context, config, end_result, is_nested)
             end_result.evaluation_details = self._create_evaluation_details(
-                self._spec_store.init_reason)
+                self._spec_store.init_reason, context.specs)
         except RecursionError:
             raise
         except Exception:
             end_result.evaluation_details = self._create_evaluation_details(
-                EvaluationReason.error)
+                EvaluationReason.error, context.specs)
             end_result.rule_id = "error"
 
-    def __check_id_in_list(self, id, list_name):
+    def __check_id_in_list(self, context, id, list_name):
         curr_list = self._spec_store.get_id_list(list_name)
         if curr_list is None:
             return False
         ids = curr_list.get("ids", set())
-        hashed = base64.b64encode(
-            sha256(str(id).encode('utf-8')).digest()).decode('utf-8')[0:8]
+        id = str(id)
+        hashed = context.id_list_digests.get(id)
+        if hashed is None:
+            hashed = base64.b64encode(
+                sha256(id.encode('utf-8')).digest()).decode('utf-8')[0:8]
+            context.id_list_digests[id] = hashed
         return hashed in ids
 
-    def __evaluate(self, user, config, end_result, is_nested=False):
-        if not config.get("enabled", False):
-            self.__finalize_eval_result(config, end_result, False, None, is_nested)
-            return
+    def __evaluate(self, context, config, end_result, is_nested=False):
+        in_cycle = config.in_cycle
+        if in_cycle:
+            # reaching a spec again from within its own evaluation would recurse forever
+            if config in context.evaluating:
+                raise RecursionError(f"Circular reference to {config.name}")
+            context.evaluating.add(config)
+        try:
+            if not config.enabled:
+                self.__finalize_eval_result(config, end_result, False, None, is_nested)
+                return
 
-        for rule in config.get("rules", []):
-            self.__evaluate_rule(user, rule, end_result)
-            if end_result.boolean_value:
-                if self.__evaluate_delegate(user, rule, end_result) is not None:
-                    self.__finalize_exposures(end_result)
+            for rule in config.rules:
+                if rule.nests_gates:
+                    yield from self.__evaluate_nesting_rule(context, rule, end_result)
+                else:
+                    self.__evaluate_rule(context, rule, end_result)
+                if end_result.boolean_value:
+                    if rule.config_delegate is not None \
+                            and (yield from self.__evaluate_delegate(context, rule, end_result)) is not None:
+                        self.__finalize_exposures(end_result)
+                        return
+
+                    user_passes = self.__eval_pass_percentage(context, rule, config)
+                    self.__finalize_eval_result(config, end_result, user_passes, rule, is_nested)
                     return
 
-                user_passes = self.__eval_pass_percentage(user, rule, config)
-                self.__finalize_eval_result(config, end_result, user_passes, rule, is_nested)
-                return
-
-        self.__finalize_eval_result(config, end_result, False, None, is_nested)
+            self.__finalize_eval_result(config, end_result, False, None, is_nested)
+        finally:
+            if in_cycle:
+                context.evaluating.discard(config)
 
     def __finalize_eval_result(self, config, end_result, did_pass, rule, is_nested=False):
         end_result.boolean_value = did_pass
 
         if rule is None:
-            end_result.json_value = config.get("defaultValue", {})
+            end_result.json_value = config.default_value
             end_result.group_name = None
             end_result.is_experiment_group = False
-            end_result.rule_id = "default" if config.get("enabled") else "disabled"
+            end_result.rule_id = "default" if config.enabled else "disabled"
         else:
-            end_result.json_value = rule.get("returnValue") if did_pass else config.get("defaultValue", {})
-            end_result.group_name = rule.get("groupName", None)
-            end_result.is_experiment_group = rule.get("isExperimentGroup", False)
-            end_result.rule_id = rule.get("id", "")
+            end_result.json_value = rule.return_value if did_pass else config.default_value
+            end_result.group_name = rule.group_name
+            end_result.is_experiment_group = rule.is_experiment_group
+            end_result.rule_id = rule.id
 
         if not is_nested:
             self.__finalize_exposures(end_result)
@@ -307,350 +445,157 @@ class _Evaluator:
         end_result.secondary_exposures = self.clean_exposures(end_result.secondary_exposures)
         end_result.undelegated_secondary_exposures = self.clean_exposures(end_result.undelegated_secondary_exposures)
 
-    def __evaluate_rule(self, user, rule, end_result):
-        total_eval_result = True
-        for condition in rule.get("conditions", []):
-            eval_result = self.__evaluate_condition(user, condition, end_result)
-            if not eval_result:
+    def __evaluate_rule(self, context, rule, end_result):
+        conditions = rule.live_conditions
+        total_eval_result = rule.folded_result
+        if rule.folds_environment and context.user._statsig_environment != rule.environment:
+            conditions = rule.conditions
+            total_eval_result = True
+        for condition in conditions:
+            if not total_eval_result and self._short_circuit_rules:
+                break
+            if not self.__evaluate_condition(context, condition):
                 total_eval_result = False
         end_result.boolean_value = total_eval_result
 
-    def __evaluate_delegate(self, user, rule, end_result):
-        config_delegate = rule.get("configDelegate", None)
-        if config_delegate is None:
-            return None
+    def __evaluate_nesting_rule(self, context, rule, end_result):
+        conditions = rule.live_conditions
+        total_eval_result = rule.folded_result
+        if rule.folds_environment and context.user._statsig_environment != rule.environment:
+            conditions = rule.conditions
+            total_eval_result = True
+        for condition in conditions:
+            if condition.is_gate:
+                passed = yield from self.__evaluate_gate_condition(context, condition, end_result)
+            # once the rule has failed only nested gates still need to run, since the other
+            # SDKs report their secondary exposures either way
+            elif not total_eval_result and self._short_circuit_rules:
+                continue
+            else:
+                passed = self.__evaluate_condition(context, condition)
+            if not passed:
+                total_eval_result = False
+        end_result.boolean_value = total_eval_result
 
-        config = self._spec_store.get_config(config_delegate)
+    def __evaluate_delegate(self, context, rule, end_result):
+        config_delegate = rule.config_delegate
+        config = rule.delegate_spec or context.specs.get_config(config_delegate)
         if config is None:
             return None
 
-        end_result.undelegated_secondary_exposures = end_result.secondary_exposures[:]
+        if context.track_exposures:
+            end_result.undelegated_secondary_exposures = end_result.secondary_exposures[:]
 
-        self.__evaluate(user, config, end_result, True)
-        end_result.explicit_parameters = config.get(
-            "explicitParameters", [])
+        yield from self.__evaluate(context, config, end_result, True)
+        end_result.explicit_parameters = config.explicit_parameters
         end_result.allocated_experiment = config_delegate
         return end_result
 
-    def __evaluate_condition(self, user, condition, end_result):
-        value = None
-        type = condition.get("type", "").upper()
-        target = condition.get("targetValue")
-        field = condition.get("field", "")
-        id_Type = condition.get("idType", "userID")
-        if type == "PUBLIC":
-            return True
-        if type in ("FAIL_GATE", "PASS_GATE"):
-            self.check_gate(user, target, end_result, True)
+    def __evaluate_gate_condition(self, context, condition, end_result):
+        type = condition.type
+        target = condition.target
+        if type in (CONDITION_FAIL_GATE, CONDITION_PASS_GATE):
+            yield from self.__check_nested_gate(context, target, end_result, condition.target_spec)
 
-            new_exposure = {
-                "gate": target,
-                "gateValue": "true" if end_result.boolean_value else "false",
-                "ruleID": end_result.rule_id
-            }
+            if context.track_exposures:
+                new_exposure = {
+                    "gate": target,
+                    "gateValue": "true" if end_result.boolean_value else "false",
+                    "ruleID": end_result.rule_id
+                }
 
-            end_result.secondary_exposures.append(new_exposure)
+                end_result.own_secondary_exposures().append(new_exposure)
 
-            pass_gate = end_result.boolean_value if type == "PASS_GATE" else not end_result.boolean_value
+            pass_gate = end_result.boolean_value if type == CONDITION_PASS_GATE else not end_result.boolean_value
             return pass_gate
-        if type in ("MULTI_PASS_GATE", "MULTI_FAIL_GATE"):
+        if type in (CONDITION_MULTI_PASS_GATE, CONDITION_MULTI_FAIL_GATE):
             if target is None or len(target) == 0:
                 return False
             pass_gate = False
-            for gate in target:
-                other_result = self.check_gate(user, gate)
-
-                new_exposure = {
-                    "gate": gate,
-                    "gateValue": "true" if other_result.boolean_value else "false",
-                    "ruleID": other_result.rule_id
-                }
-                end_result.secondary_exposures.append(new_exposure)
-
-                pass_gate = pass_gate or other_result.boolean_value if type == "MULTI_PASS_GATE" else pass_gate or not other_result.boolean_value
+            gate_specs = condition.target_spec or [None] * len(target)
+            for gate, gate_spec in zip(target, gate_specs):
+                other_result = yield from self.__check_nested_gate(context, gate, _ConfigEvaluation(), gate_spec)
+
+                if context.track_exposures:
+                    new_exposure = {
+                        "gate": gate,
+                        "gateValue": "true" if other_result.boolean_value else "false",
+                        "ruleID": other_result.rule_id
+                    }
+                    end_result.own_secondary_exposures().append(new_exposure)
+
+                pass_gate = pass_gate or other_result.boolean_value if type == CONDITION_MULTI_PASS_GATE else pass_gate or not other_result.boolean_value
                 if pass_gate:
                     break
             return pass_gate
-        if type == "IP_BASED":
-            value = self.__get_from_user(user, field)
+        return False
+
+    def __evaluate_condition(self, context, condition):
+        user = context.user
+        value = None
+        type = condition.type
+        target = condition.target
+        if type == CONDITION_PUBLIC:
+            return True
+        if type == CONDITION_IP_BASED:
+            value = condition.get_user_field(user)
             if value is None:
-                ip = self.__get_from_user(user, "ip")
-                if ip is not None and field == "country":
-                    value = self._country_lookup.lookupStr(ip)
+                ip = _get_ip(user)
+                if ip is not None and condition.field == "country":
+                    value = self._ip_country_cache.get_or_compute(ip, self.__lookup_country)
             if value is None:
                 return False
-        elif type == "UA_BASED":
-            value = self.__get_from_user_agent(user, field)
-        elif type == "USER_FIELD":
-            value = self.__get_from_user(user, field)
-        elif type == "CURRENT_TIME":
+        elif type == CONDITION_UA_BASED:
+            value = self.__get_from_user_agent(user, condition.ua_field)
+        elif type == CONDITION_USER_FIELD:
+            value = condition.get_user_field(user)
+        elif type == CONDITION_CURRENT_TIME:
             value = round(time.time() * 1000)
-        elif type == "ENVIRONMENT_FIELD":
-            value = self.__get_from_environment(user, field)
-        elif type == "USER_BUCKET":
-            salt = condition.get("additionalValues", {
-                "salt": None}).get("salt")
-            salt_str = self.__get_value_as_string(salt) or ""
-            unit_id = self.__get_unit_id(user, id_Type) or ""
+        elif type == CONDITION_ENVIRONMENT_FIELD:
+            value = get_environment_field(user._statsig_environment, condition.field)
+        elif type == CONDITION_USER_BUCKET:
+            unit_id = condition.get_unit_id(user) or ""
             value = int(self.__compute_user_hash(
-                salt_str + "." + unit_id) % 1000)
-        elif type == "UNIT_ID":
-            value = self.__get_unit_id(user, id_Type)
-
-        op = condition.get("operator")
-        user_bucket = condition.get("user_bucket")
-        if op == "gt":
-            val = self.__get_value_as_float(value)
-            target = self.__get_value_as_float(target)
-            if val is None or target is None:
-                return False
-            return val > target
-        if op == "gte":
-            val = self.__get_value_as_float(value)
-            target = self.__get_value_as_float(target)
-            if val is None or target is None:
-                return False
-            return val >= target
-        if op == "lt":
-            val = self.__get_value_as_float(value)
-            target = self.__get_value_as_float(target)
-            if val is None or target is None:
-                return False
-            return val < target
-        if op == "lte":
-            val = self.__get_value_as_float(value)
-            target = self.__get_value_as_float(target)
-            if val is None or target is None:
-                return False
-            return val <= target
-        if op == "version_gt":
-            return self.__version_compare_helper(
-                value, target, lambda result: result > 0)
-        if op == "version_gte":
-            return self.__version_compare_helper(
-                value, target, lambda result: result >= 0)
-        if op == "version_lt":
-            return self.__version_compare_helper(
-                value, target, lambda result: result < 0)
-        if op == "version_lte":
-            return self.__version_compare_helper(
-                value, target, lambda result: result <= 0)
-        if op == "version_eq":
-            return self.__version_compare_helper(
-                value, target, lambda result: result == 0)
-        if op == "version_neq":
-            return self.__version_compare_helper(
-                value, target, lambda result: result != 0)
-        if op == "any":
-            if user_bucket is not None:
-                return self.__lookup_user_bucket(value, user_bucket)
-            return self.__fast_match_string_in_array(value, condition)
-        if op == "none":
-            if user_bucket is not None:
-                return not self.__lookup_user_bucket(value, user_bucket)
-            return not self.__fast_match_string_in_array(value, condition)
-        if op == "any_case_sensitive":
-            return self.__match_string_in_array(
-                value, target, lambda a, b: a == b)
-        if op == "none_case_sensitive":
-            return not self.__match_string_in_array(
-                value, target, lambda a, b: a == b)
-        if op == "str_starts_with_any":
-            return self.__match_string_in_array(
-                value, target, lambda a, b: a.upper().lower().startswith(
-                    b.upper().lower()))
-        if op == "str_ends_with_any":
-            return self.__match_string_in_array(
-                value, target, lambda a, b: a.upper().lower().endswith(
-                    b.upper().lower()))
-        if op == "str_contains_any":
-            return self.__match_string_in_array(
-                value, target, lambda a, b: b.upper().lower() in a.upper().lower())
-        if op == "str_contains_none":
-            return not self.__match_string_in_array(
-                value, target, lambda a, b: b.upper().lower() in a.upper().lower())
-        if op == "str_matches":
-            str_value = self.__get_value_as_string(value)
-            str_target = self.__get_value_as_string(target)
-            if str_value is None or str_target is None:
-                return False
-            return bool(
-                re.search(str_target, str_value))
-        if op == "eq":
-            return value == target
-        if op == "neq":
-            return value != target
-        if op == "before":
-            return self.__compare_dates(value, target, lambda a, b: a < b)
-        if op == "after":
-            return self.__compare_dates(value, target, lambda a, b: a > b)
-        if op == "on":
-            return self.__compare_dates(
-                value, target, lambda a, b: a.date() == b.date())
-        if op in ("in_segment_list", "not_in_segment_list"):
-            in_list = self.__check_id_in_list(value, target)
-            return in_list if op == "in_segment_list" else not in_list
-
-        return True
-
-    def __get_from_user(self, user, field):
-        value = None
-        lower_field = field.lower()
-        if lower_field in ("userid", "user_id"):
-            value = user.user_id
-        elif lower_field == "email":
-            value = user.email
-        elif lower_field in ("ip", "ipaddress", "ip_address"):
-            value = user.ip
-        elif lower_field in ("useragent", "user_agent"):
-            value = user.user_agent
-        elif lower_field == "country":
-            value = user.country
-        elif lower_field == "locale":
-            value = user.locale
-        elif lower_field in ("appversion", "app_version"):
-            value = user.app_version
-
-        if (value is None or value == "") and user.custom is not None:
-            if field in user.custom:
-                value = user.custom[field]
-            elif field.upper().lower() in user.custom:
-                value = user.custom[field.upper().lower()]
-
-        if (value is None or value == "") and user.private_attributes is not None:
-            if field in user.private_attributes:
-                value = user.private_attributes[field]
-            elif field.lower() in user.private_attributes:
-                value = user.private_attributes[field.lower()]
-
-        return value
-
-    def __get_from_environment(self, user, field):
-        if user._statsig_environment is None:
-            return None
-        if field in user._statsig_environment:
-            return user._statsig_environment[field]
-        if field.lower() in user._statsig_environment:
-            return user._statsig_environment[field]
-        return None
-
-    def __compute_user_hash(self, input):
-        return unpack('>Q', sha256(str(input).encode('utf-8')).digest()[:8])[0]
-
-    def __eval_pass_percentage(self, user, rule, config):
-        rule_salt = rule.get("salt", rule.get("id", ""))
-        id = self.__get_unit_id(user, rule.get("idType", "userID")) or ""
-        config_salt = config.get("salt", "")
+                context, condition.bucket_salt + unit_id) % USER_BUCKET_COUNT)
+        elif type == CONDITION_UNIT_ID:
+            value = condition.get_unit_id(user)
+
+        op = condition.operator
+        if op in SEGMENT_LIST_OPERATORS:
+            in_list = self.__check_id_in_list(context, value, target)
+            return in_list if op == OPERATOR_IN_SEGMENT_LIST else not in_list
+
+        return condition.match(value)
+
+    def __compute_user_hash(self, context, input):
+        input = str(input)
+        hash = context.user_hashes.get(input)
+        if hash is None:
+            hash = unpack('>Q', sha256(input.encode('utf-8')).digest()[:8])[0]
+            context.user_hashes[input] = hash
+        return hash
+
+    def __eval_pass_percentage(self, context, rule, config):
+        if rule.known_pass is not None:
+            return rule.known_pass
+        id = rule.get_unit_id(context.user) or ""
         hash = self.__compute_user_hash(
-            config_salt + "." + rule_salt + "." + str(id)
+            context, config.salt + "." + rule.salt + "." + str(id)
         )
-        pass_percentage = rule.get("passPercentage", 0)
-        return (hash % 10000) < pass_percentage * 100
-
-    def __get_unit_id(self, user, id_type):
-        if id_type is not None and id_type.lower() != "userid":
-            if user.custom_ids is None:
-                return None
-            custom_id = user.custom_ids.get(
-                id_type, None)
-            if custom_id is not None:
-                return custom_id
-            return user.custom_ids.get(id_type.lower(), None)
-        return user.user_id
-
-    def __fast_match_string_in_array(self, value, condition):
-        str_value = self.__get_value_as_string(value)
-        target = condition.get("targetValue")
-        if str_value is None or target is None:
-            return False
-
-        try:
-            fastTarget = condition.get("fastTargetValue")
-            if not fastTarget:
-                fastTarget = [ str(a).upper().lower() for a in target ]
-                fastTarget.sort()
-                condition["fastTargetValue"] = fastTarget
-
-            value = str_value.upper().lower()
-            ret = binary_search(fastTarget, value) != -1
-            return ret
-        except Exception as e:
-            print("EXC", e, condition.get("targetValue"))
-        return False
-
-    def __match_string_in_array(self, value, target, compare):
-        str_value = self.__get_value_as_string(value)
-        if str_value is None or target is None:
-            return False
-        for match in target:
-            str_match = self.__get_value_as_string(match)
-            if str_match is None:
-                continue
-            if compare(str_value, str_match):
-                return True
-        return False
-
-    def __lookup_user_bucket(self, val, lookup):
-        if isinstance(val, int):
-            return val in lookup
-        return False
-
-    def __version_compare(self, v1, v2, compare):
-        p1 = v1.split(".")
-        p2 = v2.split(".")
-
-        i = 0
-        try:
-            while i < max(len(p1), len(p2)):
-                c1 = 0
-                c2 = 0
-                if i < len(p1):
-                    c1 = int(float(p1[i]))
-                if i < len(p2):
-                    c2 = int(float(p2[i]))
-                if c1 < c2:
-                    return compare(-1)
-                if c1 > c2:
-                    return compare(1)
-                i += 1
-        except ValueError:
-            return False
-
-        return compare(0)
-
-    def __version_compare_helper(self, v1, v2, compare):
-        v1_str = self.__get_value_as_string(v1)
-        v2_str = self.__get_value_as_string(v2)
-
-        if v1_str is None or v2_str is None:
-            return False
-
-        d1 = v1_str.find('-')
-        if d1 > 0:
-            v1_str = v1_str[0:d1]
-
-        d2 = v2_str.find('-')
-        if d2 > 0:
-            v2_str = v2_str[0:d2]
-
-        return self.__version_compare(v1_str, v2_str, compare)
-
-    def __get_value_as_string(self, input):
-        if input is None:
-            return None
-        return str(input)
+        return (hash % 10000) < rule.pass_percentage * 100
 
-    def __get_value_as_float(self, input):
-        if input is None:
-            return None
-        return float(input)
+    def __lookup_country(self, ip):
+        if self._country_lookup is None:
+            with self._country_lookup_lock:
+                if self._country_lookup is None:
+                    self._country_lookup = CountryLookup()
+        return self._country_lookup.lookupStr(ip)
 
     def __get_from_user_agent(self, user, field):
-        ua = self.__get_from_user(user, "userAgent")
+        ua = _get_user_agent(user)
         if ua is None:
             return None
-        parsed = user_agent_parser.Parse(ua)
-        field = field.lower()
+        parsed = self._user_agent_cache.get_or_compute(ua, user_agent_parser.Parse)
         if field in ("osname", "os_name"):
             return parsed.get("os", {"family": None}).get("family")
         if field in ("os_version", "osversion"):
@@ -685,24 +630,3 @@ class _Evaluator:
             return numeric
         except ValueError:
             return None
-
-    def __compare_dates(self, first, second, compare):
-        if first is None and second is None:
-            return False
-
-        first_date = self.__get_date(first)
-        second_date = self.__get_date(second)
-        if first_date is None or second_date is None:
-            return False
-
-        return compare(first_date, second_date)
-
-    def __get_date(self, d):
-        if d is None:
-            return None
-
-        epoch = int(d)
-        if len(str(d)) >= 11:
-            epoch //= 1000
-
-        return datetime.fromtimestamp(epoch)
@@ -1,4 +1,6 @@
 class FeatureGate:
+    __slots__ = ("value", "name", "rule_id", "group_name", "evaluation_details")
+
     def __init__(self, data, name, rule, group_name=None, evaluation_details=None):
         self.value = False if data is None else data
         self.name = "" if name is None  else name
@@ -0,0 +1,133 @@
+import codecs
+import json
+from typing import Iterable, Iterator, List, Union
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+class _ChunkReader:
+    """Text read so far from a stream of UTF-8 chunks, dropping what has been consumed"""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks: Iterator[Union[bytes, str]] = iter(chunks)
+        # utf-8-sig also drops a byte order mark, as json.loads would reject it
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending: List[str] = []
+        self._pending_length = 0
+        self.text = ""
+        self.pos = 0
+        self.done = False
+
+    def read(self) -> bool:
+        """Queues the next chunk, returns False once the stream is exhausted"""
+        if self.done:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.done = True
+            # raises if the stream ends partway through a character
+            self._utf8.decode(b"", final=True)
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk)
+        self._pending.append(chunk)
+        self._pending_length += len(chunk)
+        return True
+
+    def flush(self):
+        """Moves queued chunks onto the unconsumed text"""
+        if self._pending:
+            self.text = self.text[self.pos:] + "".join(self._pending)
+            self.pos = 0
+            self._pending = []
+            self._pending_length = 0
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, or '' at the end of the stream"""
+        while True:
+            text = self.text
+            pos = self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self._pending and not self.read():
+                return ""
+            self.flush()
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.text, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decodes the JSON value starting at the next character"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # a number cut off by the end of the text, like "-1." of "-1.5", still decodes
+                if self.done or end < len(self.text) and self.text[end] not in _NUMBER_CHARS:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.done:
+                    raise
+            # an incomplete value only fails to decode, so read until there is twice as much
+            # text before retrying, which keeps decoding a large value linear
+            attempted = len(self.text) - self.pos
+            while self.read() and self._pending_length < attempted:
+                pass
+            self.flush()
+
+
+def load_object_stream(chunks: Iterable[Union[bytes, str]]):
+    """Decodes a JSON document from a stream of UTF-8 chunks, as json.loads would the whole text.
+
+    Arrays directly under a top-level object are decoded an element at a time, so only
+    the text of the element being decoded is held alongside the values built so far,
+    never the whole document.
+    """
+    reader = _ChunkReader(chunks)
+    if reader.peek() != "{":
+        result = reader.value()
+    else:
+        reader.expect("{")
+        result = {}
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                if reader.peek() != '"':
+                    raise json.JSONDecodeError("Expecting property name enclosed in double quotes",
+                                               reader.text, reader.pos)
+                key = reader.value()
+                reader.expect(":")
+                result[key] = _array(reader) if reader.peek() == "[" else reader.value()
+                if reader.peek() == ",":
+                    reader.pos += 1
+                    continue
+                reader.expect("}")
+                break
+
+    if reader.peek() != "":
+        raise json.JSONDecodeError("Extra data", reader.text, reader.pos)
+    return result
+
+
+def _array(reader: _ChunkReader) -> list:
+    reader.expect("[")
+    items: list = []
+    if reader.peek() == "]":
+        reader.pos += 1
+        return items
+    while True:
+        items.append(reader.value())
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("]")
+        return items
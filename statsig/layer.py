@@ -3,19 +3,23 @@ from typing import Callable, Optional
 
 class Layer:
     __create_key = object()
+    __slots__ = ("__log_func", "__value", "name", "rule_id", "group_name", "allocated_experiment",
+                 "evaluation_details", "_user", "_config_evaluation")
 
     @classmethod
     def _create(cls, name: str, value: dict, rule: str, group_name=None,
-                allocated_experiment=None, param_log_func=None, evaluation_details=None):
+                allocated_experiment=None, param_log_func=None, evaluation_details=None,
+                user=None, config_evaluation=None):
         return Layer(
             cls.__create_key, name, value, rule, group_name, allocated_experiment,
-            param_log_func, evaluation_details=evaluation_details)
+            param_log_func, evaluation_details=evaluation_details, user=user,
+            config_evaluation=config_evaluation)
 
     def __init__(self, create_key, name: str, value: dict, rule: str,
                  group_name: Optional[str],
                  allocated_experiment: Optional[str],
                  param_log_func: Callable[['Layer', str], None],
-                 evaluation_details=None):
+                 evaluation_details=None, user=None, config_evaluation=None):
         assert (create_key == Layer.__create_key), \
             "Layers should only be created internally by Statsig"
 
@@ -32,6 +36,9 @@ class Layer:
         self.group_name = group_name
         self.allocated_experiment = allocated_experiment
         self.evaluation_details = evaluation_details
+        # what param_log_func logs the parameter exposures against
+        self._user = user
+        self._config_evaluation = config_evaluation
 
     def get(self, key, default=None):
         """Returns the value of the layer at the given key
@@ -0,0 +1,778 @@
+import functools
+import operator
+import re
+import sys
+from datetime import datetime
+from typing import AbstractSet, Dict, List, Optional, Tuple, Union
+
+from .constants import Const
+from .string_matchers import contains_any, ends_with_any, starts_with_any
+from . import globals
+
+_USER_FIELD_ATTRIBUTES = {
+    "userid": "user_id",
+    "user_id": "user_id",
+    "email": "email",
+    "ip": "ip",
+    "ipaddress": "ip",
+    "ip_address": "ip",
+    "useragent": "user_agent",
+    "user_agent": "user_agent",
+    "country": "country",
+    "locale": "locale",
+    "appversion": "app_version",
+    "app_version": "app_version",
+}
+
+_NUMERIC_COMPARES = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+_VERSION_COMPARES = {
+    "version_gt": operator.gt,
+    "version_gte": operator.ge,
+    "version_lt": operator.lt,
+    "version_lte": operator.le,
+    "version_eq": operator.eq,
+    "version_neq": operator.ne,
+}
+
+_DATE_COMPARES = {
+    "before": lambda a, b: a < b,
+    "after": lambda a, b: a > b,
+    "on": lambda a, b: a.date() == b.date(),
+}
+
+# condition types and operators are int coded, with 0 for anything unrecognized. These are
+# plain ints rather than an IntEnum so the evaluator compares them without attribute lookups
+CONDITION_PUBLIC = 1
+CONDITION_PASS_GATE = 2
+CONDITION_FAIL_GATE = 3
+CONDITION_MULTI_PASS_GATE = 4
+CONDITION_MULTI_FAIL_GATE = 5
+CONDITION_IP_BASED = 6
+CONDITION_UA_BASED = 7
+CONDITION_USER_FIELD = 8
+CONDITION_ENVIRONMENT_FIELD = 9
+CONDITION_CURRENT_TIME = 10
+CONDITION_USER_BUCKET = 11
+CONDITION_UNIT_ID = 12
+
+_CONDITION_TYPES = {
+    "PUBLIC": CONDITION_PUBLIC,
+    "PASS_GATE": CONDITION_PASS_GATE,
+    "FAIL_GATE": CONDITION_FAIL_GATE,
+    "MULTI_PASS_GATE": CONDITION_MULTI_PASS_GATE,
+    "MULTI_FAIL_GATE": CONDITION_MULTI_FAIL_GATE,
+    "IP_BASED": CONDITION_IP_BASED,
+    "UA_BASED": CONDITION_UA_BASED,
+    "USER_FIELD": CONDITION_USER_FIELD,
+    "ENVIRONMENT_FIELD": CONDITION_ENVIRONMENT_FIELD,
+    "CURRENT_TIME": CONDITION_CURRENT_TIME,
+    "USER_BUCKET": CONDITION_USER_BUCKET,
+    "UNIT_ID": CONDITION_UNIT_ID,
+}
+
+GATE_CONDITION_TYPES = (
+    CONDITION_PASS_GATE, CONDITION_FAIL_GATE, CONDITION_MULTI_PASS_GATE, CONDITION_MULTI_FAIL_GATE)
+
+# operators match case-sensitively, as they always have
+_OPERATORS = {name: code for code, name in enumerate(Const.SUPPORTED_OPERATORS, start=1)}
+
+OPERATOR_IN_SEGMENT_LIST = _OPERATORS["in_segment_list"]
+OPERATOR_NOT_IN_SEGMENT_LIST = _OPERATORS["not_in_segment_list"]
+
+SEGMENT_LIST_OPERATORS = (OPERATOR_IN_SEGMENT_LIST, OPERATOR_NOT_IN_SEGMENT_LIST)
+
+VERSION_PARSE_CACHE_SIZE = 1000
+
+USER_BUCKET_COUNT = 1000
+
+# dates compare as naive local times, which differ from epoch time by the UTC offset (at
+# most 26 hours apart across zones and DST). Further than this from the target the result
+# of a CURRENT_TIME condition is settled
+_TIME_SETTLED_MARGIN_MS = 3 * 24 * 60 * 60 * 1000
+
+# results of before/after/on long before and long after the target
+_DATE_SETTLED_RESULTS = {
+    "before": (True, False),
+    "after": (False, True),
+    "on": (False, False),
+}
+
+
+class _Condition:
+    """A condition with its type and operator int coded and its target pre-coerced.
+
+    match is bound at compile time and takes the value fetched for the condition.
+    Gate and segment list conditions need evaluator state and have no matcher.
+    folded holds the result of PUBLIC conditions, and of ENVIRONMENT_FIELD conditions
+    under the environment compiled against, and is None for everything else.
+    """
+
+    __slots__ = ("type", "operator", "target", "field", "id_type", "get_unit_id", "get_user_field",
+                 "ua_field", "bucket_salt", "is_gate", "target_spec", "match", "folded")
+
+    def __init__(self, condition: dict, environment=None):
+        type_name = condition.get("type")
+        type_name = type_name.upper() if isinstance(type_name, str) else ""
+        operator_name = condition.get("operator")
+        self.type = _CONDITION_TYPES.get(type_name, 0)
+        self.operator = _OPERATORS.get(operator_name, 0) if isinstance(operator_name, str) else 0
+        self.target = _intern(condition.get("targetValue"))
+        self.field = _intern(condition.get("field") or "")
+        self.id_type = _intern(condition.get("idType", "userID"))
+        self.get_unit_id = _checked_unit_id_getter(self.id_type)
+        if isinstance(self.field, str):
+            self.get_user_field = user_field_getter(self.field)
+            self.ua_field = _intern(self.field.lower())
+        else:
+            self.get_user_field = _malformed_getter("field", self.field)
+            self.ua_field = None
+
+        salt = (condition.get("additionalValues") or {}).get("salt")
+        self.bucket_salt = ("" if salt is None else str(salt)) + "."
+
+        self.is_gate = self.type in GATE_CONDITION_TYPES
+        # the gate spec, or for MULTI_* conditions the list of them, set by link_specs
+        self.target_spec: Union["_Spec", List[Optional["_Spec"]], None] = None
+
+        self.match = None
+        if self.type != CONDITION_PUBLIC and not self.is_gate and self.operator not in SEGMENT_LIST_OPERATORS:
+            self.match = _compile_matcher(type_name, operator_name, self.target)
+
+        self.folded = None
+        if self.type == CONDITION_PUBLIC:
+            self.folded = True
+        elif self.type == CONDITION_ENVIRONMENT_FIELD and self.match is not None:
+            try:
+                self.folded = bool(self.match(get_environment_field(environment, self.field)))
+            except Exception:
+                # left to fail per evaluation, as it would have
+                pass
+
+
+class _Rule:
+    """A rule with its user-independent conditions folded.
+
+    live_conditions still have to be evaluated and start from folded_result. Both only
+    hold for users in the compiled environment when folds_environment is set; otherwise
+    every condition is evaluated. known_pass is the pass percentage outcome when it does
+    not depend on the unit ID hash. nests_gates marks rules that evaluate other gates.
+    """
+
+    __slots__ = ("id", "salt", "id_type", "get_unit_id", "pass_percentage", "return_value", "group_name",
+                 "is_experiment_group", "config_delegate", "delegate_spec", "conditions", "live_conditions",
+                 "folded_result", "environment", "folds_environment", "known_pass", "nests_gates")
+
+    def __init__(self, rule: dict, environment=None):
+        self.id = _intern(rule.get("id", ""))
+        self.salt = rule.get("salt", rule.get("id", ""))
+        self.id_type = _intern(rule.get("idType", "userID"))
+        self.get_unit_id = _checked_unit_id_getter(self.id_type)
+        self.pass_percentage = rule.get("passPercentage", 0)
+        self.return_value = rule.get("returnValue")
+        self.group_name = rule.get("groupName", None)
+        self.is_experiment_group = rule.get("isExperimentGroup", False)
+        self.config_delegate = _intern(rule.get("configDelegate", None))
+        self.delegate_spec = None
+        self.conditions = [_Condition(c, environment) for c in rule.get("conditions", [])]
+
+        self.live_conditions = [c for c in self.conditions if c.folded is None]
+        self.folded_result = all(c.folded for c in self.conditions if c.folded is not None)
+        self.environment = environment
+        self.folds_environment = any(
+            c.folded is not None and c.type == CONDITION_ENVIRONMENT_FIELD for c in self.conditions)
+        self.nests_gates = any(c.is_gate for c in self.conditions)
+
+        self.known_pass = None
+        if isinstance(self.salt, str) and isinstance(self.pass_percentage, (int, float)) \
+                and not isinstance(self.pass_percentage, bool):
+            if self.pass_percentage >= 100:
+                self.known_pass = True
+            elif self.pass_percentage <= 0:
+                self.known_pass = False
+
+
+class _Spec:
+    """A gate, dynamic config or layer compiled from its download_config_specs entry.
+
+    has_dependencies marks specs whose evaluation can reach other specs through gate
+    conditions or config delegates. source is the entry it was compiled from, so a later
+    sync can tell whether the spec changed.
+    """
+
+    __slots__ = ("name", "type", "entity", "salt", "enabled", "default_value", "id_type", "explicit_parameters",
+                 "target_app_ids", "is_active", "has_shared_params", "rules", "has_dependencies", "layer", "in_cycle",
+                 "source")
+
+    def __init__(self, spec: dict, environment=None):
+        self.source = spec
+        self.name = _intern(spec.get("name"))
+        self.type = _intern(spec.get("type"))
+        self.entity = _intern(spec.get("entity"))
+        self.salt = spec.get("salt", "")
+        self.enabled = spec.get("enabled", False)
+        self.default_value = spec.get("defaultValue", {})
+        self.id_type = _intern(spec.get("idType"))
+        self.explicit_parameters = spec.get("explicitParameters", [])
+        self.target_app_ids = spec.get("targetAppIDs", [])
+        self.is_active = spec.get("isActive", False) is True
+        self.has_shared_params = spec.get("hasSharedParams", False)
+        self.rules = [_Rule(r, environment) for r in spec.get("rules", [])]
+        self.has_dependencies = any(r.nests_gates or r.config_delegate is not None for r in self.rules)
+        # set by link_specs
+        self.layer = None
+        self.in_cycle = False
+        if not isinstance(self.salt, str):
+            # the pass percentage hash input can't be built, keep its per-evaluation error
+            for rule in self.rules:
+                rule.known_pass = None
+
+
+def compile_spec(spec: dict, environment=None) -> _Spec:
+    """Compiles a spec, folding ENVIRONMENT_FIELD conditions against environment"""
+    if environment is not None:
+        environment = dict(environment)
+    return _Spec(spec, environment)
+
+
+def link_specs(gates: dict, configs: dict, layers: dict, experiment_to_layer: dict, linked: AbstractSet[_Spec] = frozenset()):
+    """Resolves gate conditions, config delegates and experiment layers into direct references.
+
+    Specs that can reach themselves through those references are flagged in_cycle. Specs in
+    linked already hold their references (see relink_reused) and are left as they are.
+    Returns the names of missing targets and of the specs flagged.
+    """
+    missing = set()
+    references = {}
+    for spec in _all_specs(gates, configs, layers):
+        relink = spec not in linked
+        spec_references = []
+        for rule in spec.rules:
+            delegate = rule.config_delegate
+            if isinstance(delegate, str):
+                delegate_spec = configs.get(delegate)
+                if relink:
+                    rule.delegate_spec = delegate_spec
+                if delegate_spec is None:
+                    missing.add(delegate)
+                else:
+                    spec_references.append(delegate_spec)
+
+            for condition in rule.conditions:
+                if not condition.is_gate:
+                    continue
+                if condition.type in (CONDITION_PASS_GATE, CONDITION_FAIL_GATE):
+                    targets = [condition.target]
+                elif isinstance(condition.target, list):
+                    targets = condition.target
+                else:
+                    continue
+                target_specs = [gates.get(t) if isinstance(t, str) else None for t in targets]
+                for target, target_spec in zip(targets, target_specs):
+                    if target_spec is not None:
+                        spec_references.append(target_spec)
+                    elif isinstance(target, str):
+                        missing.add(target)
+                if relink:
+                    is_multi = condition.type not in (CONDITION_PASS_GATE, CONDITION_FAIL_GATE)
+                    condition.target_spec = target_specs if is_multi else target_specs[0]
+        references[spec] = spec_references
+
+    for name, spec in configs.items():
+        if spec not in linked:
+            layer_name = experiment_to_layer.get(name)
+            spec.layer = layers.get(layer_name) if layer_name is not None else None
+
+    cyclic = _flag_cycles(references)
+    return missing, cyclic
+
+
+def relink_reused(gates: dict, configs: dict, layers: dict, experiment_to_layer: dict, reused: set,
+                  environment=None) -> int:
+    """Recompiles the specs in reused whose links would change under the new payload.
+
+    A spec reused from the previous sync can still be read through that sync's snapshot, so
+    link_specs may only write back the references it already holds. That holds while every
+    spec it links to was reused too. A spec whose target changed, appeared or went away is
+    recompiled, which in turn invalidates the reused specs linking to it.
+    Returns how many were recompiled.
+    """
+    kinds = {"gate": gates, "config": configs, "layer": layers}
+    dependents: Dict[tuple, List[Tuple[str, str]]] = {}
+    stale = []
+    for kind, specs in kinds.items():
+        for name, spec in specs.items():
+            if spec not in reused:
+                continue
+            for target_kind, target, linked in _links(kind, name, spec, experiment_to_layer):
+                dependents.setdefault((target_kind, target), []).append((kind, name))
+                current = kinds[target_kind].get(target) if isinstance(target, str) else None
+                if current is not linked:
+                    stale.append((kind, name))
+
+    recompiled = 0
+    while stale:
+        kind, name = stale.pop()
+        specs = kinds[kind]
+        spec = specs[name]
+        if spec not in reused:
+            continue
+        reused.discard(spec)
+        specs[name] = compile_spec(spec.source, environment)
+        recompiled += 1
+        stale.extend(dependents.get((kind, name), []))
+    return recompiled
+
+
+def _links(kind: str, name: str, spec: _Spec, experiment_to_layer: dict):
+    """What link_specs pointed spec at, as (target kind, target name, linked spec)"""
+    for rule in spec.rules:
+        if isinstance(rule.config_delegate, str):
+            yield "config", rule.config_delegate, rule.delegate_spec
+        for condition in rule.conditions:
+            if not condition.is_gate:
+                continue
+            if condition.type in (CONDITION_PASS_GATE, CONDITION_FAIL_GATE):
+                yield "gate", condition.target, condition.target_spec
+            elif isinstance(condition.target, list):
+                target_specs = condition.target_spec
+                if not isinstance(target_specs, list):
+                    target_specs = [None] * len(condition.target)
+                yield from (("gate", t, s) for t, s in zip(condition.target, target_specs))
+    if kind == "config":
+        yield "layer", experiment_to_layer.get(name), spec.layer
+
+
+def _all_specs(*spec_dicts):
+    for specs in spec_dicts:
+        yield from specs.values()
+
+
+def _flag_cycles(references: dict):
+    """Flags every spec on a reference cycle, using Tarjan's strongly connected components
+    with an explicit stack so long reference chains can't hit the recursion limit"""
+    index: Dict[_Spec, int] = {}
+    low: Dict[_Spec, int] = {}
+    on_stack = set()
+    component_stack = []
+    cyclic = []
+
+    for root in references:
+        if root in index:
+            continue
+        work = [(root, iter(references[root]))]
+        index[root] = low[root] = len(index)
+        component_stack.append(root)
+        on_stack.add(root)
+        while work:
+            spec, children = work[-1]
+            child = next(children, None)
+            if child is not None:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    component_stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(references.get(child, []))))
+                elif child in on_stack:
+                    low[spec] = min(low[spec], index[child])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[spec])
+            if low[spec] != index[spec]:
+                continue
+            component = []
+            while True:
+                member = component_stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member is spec:
+                    break
+            if len(component) > 1 or spec in references.get(spec, []):
+                for member in component:
+                    member.in_cycle = True
+                    cyclic.append(member.name)
+    return cyclic
+
+
+def get_environment_field(environment, field):
+    if environment is None:
+        return None
+    if field in environment:
+        return environment[field]
+    if field.lower() in environment:
+        return environment[field]
+    return None
+
+
+def _intern(value):
+    """Interns names so the many specs and rules repeating them share one string"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return [sys.intern(v) for v in value]
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def user_field_getter(field: str):
+    attribute = _USER_FIELD_ATTRIBUTES.get(field.lower())
+    get_attribute = operator.attrgetter(attribute) if attribute is not None else None
+    custom_field = field.upper().lower()
+    private_field = field.lower()
+
+    def get_from_user(user):
+        value = get_attribute(user) if get_attribute is not None else None
+
+        if (value is None or value == "") and user.custom is not None:
+            if field in user.custom:
+                value = user.custom[field]
+            elif custom_field in user.custom:
+                value = user.custom[custom_field]
+
+        if (value is None or value == "") and user.private_attributes is not None:
+            if field in user.private_attributes:
+                value = user.private_attributes[field]
+            elif private_field in user.private_attributes:
+                value = user.private_attributes[private_field]
+
+        return value
+
+    return get_from_user
+
+
+@functools.lru_cache(maxsize=None)
+def unit_id_getter(id_type):
+    if id_type is None or id_type.lower() == "userid":
+        return _get_user_id
+
+    lower_id_type = id_type.lower()
+
+    def get_custom_id(user):
+        if user.custom_ids is None:
+            return None
+        custom_id = user.custom_ids.get(id_type, None)
+        if custom_id is not None:
+            return custom_id
+        return user.custom_ids.get(lower_id_type, None)
+
+    return get_custom_id
+
+
+def _get_user_id(user):
+    return user.user_id
+
+
+def _checked_unit_id_getter(id_type):
+    if id_type is None or isinstance(id_type, str):
+        return unit_id_getter(id_type)
+    return _malformed_getter("idType", id_type)
+
+
+def _malformed_getter(name, value):
+    """Fails only the evaluations reading a malformed field, rather than the whole sync"""
+    error = TypeError(f"Condition {name} must be a string, got {type(value).__name__}")
+
+    def raise_error(_user):
+        raise error
+
+    return raise_error
+
+
+def _compile_matcher(cond_type, op, target):
+    if op in _NUMERIC_COMPARES:
+        return _numeric_matcher(_NUMERIC_COMPARES[op], target)
+    if op in _VERSION_COMPARES:
+        return _version_matcher(_VERSION_COMPARES[op], target)
+    if op in ("any", "none"):
+        if cond_type == "USER_BUCKET" and isinstance(target, list) and len(target) > 0:
+            matcher = _user_bucket_matcher(target)
+        else:
+            matcher = _case_insensitive_array_matcher(target)
+        return matcher if op == "any" else _negate(matcher)
+    if op in ("any_case_sensitive", "none_case_sensitive"):
+        matcher = _string_array_matcher(target, lambda targets: targets.__contains__, normalize=False)
+        return matcher if op == "any_case_sensitive" else _negate(matcher)
+    if op == "str_starts_with_any":
+        return _string_array_matcher(target, starts_with_any)
+    if op == "str_ends_with_any":
+        return _string_array_matcher(target, ends_with_any)
+    if op in ("str_contains_any", "str_contains_none"):
+        matcher = _string_array_matcher(target, contains_any)
+        return matcher if op == "str_contains_any" else _negate(matcher)
+    if op == "str_matches":
+        return _regex_matcher(target)
+    if op == "eq":
+        return lambda value: value == target
+    if op == "neq":
+        return lambda value: value != target
+    if op in _DATE_COMPARES:
+        if cond_type == "CURRENT_TIME":
+            return _current_time_matcher(op, target)
+        return _date_matcher(_DATE_COMPARES[op], target)
+    return _always_true
+
+
+def _always_true(_value):
+    return True
+
+
+def _negate(matcher):
+    return lambda value: not matcher(value)
+
+
+def _as_float(value):
+    if value is None:
+        return None
+    return float(value)
+
+
+def _numeric_matcher(compare, target):
+    try:
+        target_float = _as_float(target)
+    except (TypeError, ValueError):
+        # keep the per-evaluation error for malformed targets
+        return lambda value: _compare_floats(compare, _as_float(value), _as_float(target))
+
+    return lambda value: _compare_floats(compare, _as_float(value), target_float)
+
+
+def _compare_floats(compare, value, target):
+    if value is None or target is None:
+        return False
+    return compare(value, target)
+
+
+def _version_matcher(compare, target):
+    if target is None:
+        return lambda _value: False
+    target_version = _parse_version(str(target))
+
+    def match(value):
+        if value is None:
+            return False
+        return _compare_versions(_parse_version(str(value)), target_version, compare)
+
+    return match
+
+
+class _Version:
+    """A version string split into integer components, with any -suffix removed.
+
+    Parsing stops at the first component that is not a number. Such a version only
+    compares where an earlier component already decides the result.
+    """
+
+    def __init__(self, version: str):
+        dash = version.find('-')
+        if dash > 0:
+            version = version[0:dash]
+
+        parts = []
+        self.is_valid = True
+        for part in version.split("."):
+            try:
+                parts.append(int(float(part)))
+            except (ValueError, OverflowError):
+                self.is_valid = False
+                break
+
+        # missing components count as 0, so with no negative components the trailing
+        # zeros can be dropped and versions compared as plain tuples
+        self.is_tuple_comparable = self.is_valid and all(p >= 0 for p in parts)
+        if self.is_tuple_comparable:
+            while len(parts) > 0 and parts[-1] == 0:
+                parts.pop()
+        self.parts = tuple(parts)
+
+
+@functools.lru_cache(maxsize=VERSION_PARSE_CACHE_SIZE)
+def _parse_version(version: str) -> _Version:
+    return _Version(version)
+
+
+def _compare_versions(v1: _Version, v2: _Version, compare):
+    if v1.is_tuple_comparable and v2.is_tuple_comparable:
+        return compare(v1.parts, v2.parts)
+
+    p1 = v1.parts
+    p2 = v2.parts
+    if v1.is_valid and v2.is_valid:
+        limit = max(len(p1), len(p2))
+    else:
+        limit = min(len(v.parts) for v in (v1, v2) if not v.is_valid)
+
+    for i in range(limit):
+        c1 = p1[i] if i < len(p1) else 0
+        c2 = p2[i] if i < len(p2) else 0
+        if c1 != c2:
+            return compare(c1, c2)
+
+    return v1.is_valid and v2.is_valid and compare(0, 0)
+
+
+def _user_bucket_matcher(target):
+    # user buckets are always in [0, USER_BUCKET_COUNT), so targets fit a fixed 125 byte bitmap
+    bitmap = bytearray(USER_BUCKET_COUNT // 8)
+    for val in target:
+        bucket = int(val)
+        if 0 <= bucket < USER_BUCKET_COUNT:
+            bitmap[bucket >> 3] |= 1 << (bucket & 7)
+    frozen = bytes(bitmap)
+
+    def match(value):
+        if not isinstance(value, int) or not 0 <= value < USER_BUCKET_COUNT:
+            return False
+        return frozen[value >> 3] & (1 << (value & 7)) != 0
+
+    return match
+
+
+def _case_insensitive_array_matcher(target):
+    if target is None:
+        return lambda _value: False
+    try:
+        targets = frozenset(str(t).upper().lower() for t in target)
+    except Exception:
+        return lambda _value: False
+
+    def match(value):
+        if value is None:
+            return False
+        return str(value).upper().lower() in targets
+
+    return match
+
+
+def _string_array_matcher(target, make_compare, normalize=True):
+    if target is None:
+        return lambda _value: False
+    try:
+        targets = tuple(
+            str(t).upper().lower() if normalize else str(t) for t in target if t is not None)
+    except TypeError as e:
+        error = e
+
+        def raise_error(value):
+            if value is None:
+                return False
+            raise error
+
+        return raise_error
+
+    compare = make_compare(targets if normalize else frozenset(targets))
+
+    def match(value):
+        if value is None:
+            return False
+        str_value = str(value)
+        return compare(str_value.upper().lower() if normalize else str_value)
+
+    return match
+
+
+def _regex_matcher(target):
+    if target is None:
+        return lambda _value: False
+    try:
+        pattern = re.compile(str(target))
+    except re.error as e:
+        globals.logger.warning(
+            "Invalid str_matches pattern %s, the condition will never pass: %s", str(target), e)
+        return lambda _value: False
+
+    def match(value):
+        if value is None:
+            return False
+        return pattern.search(str(value)) is not None
+
+    return match
+
+
+def _date_matcher(compare, target):
+    try:
+        target_date = _get_date(target)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return lambda value: _compare_dates(value, target, compare)
+
+    def match(value):
+        if value is None:
+            return False
+        value_date = _get_date(value)
+        if value_date is None or target_date is None:
+            return False
+        return compare(value_date, target_date)
+
+    return match
+
+
+def _current_time_matcher(op, target):
+    """Matches the current epoch milliseconds, which the evaluator passes as the value.
+
+    Away from the target only the settled result for that side is returned; near it the
+    result is computed at most once per second.
+    """
+    compare = _DATE_COMPARES[op]
+    try:
+        target_epoch = _get_epoch(target)
+        target_date = _get_date(target)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return _date_matcher(compare, target)
+    if target_epoch is None:
+        return _date_matcher(compare, target)
+
+    settled_until = target_epoch * 1000 - _TIME_SETTLED_MARGIN_MS
+    settled_from = target_epoch * 1000 + _TIME_SETTLED_MARGIN_MS
+    before_result, after_result = _DATE_SETTLED_RESULTS[op]
+    last = (None, False)
+
+    def match(now):
+        nonlocal last
+        if now < settled_until:
+            return before_result
+        if now >= settled_from:
+            return after_result
+        second = now // 1000
+        cached = last
+        if cached[0] != second:
+            cached = (second, compare(datetime.fromtimestamp(second), target_date))
+            last = cached
+        return cached[1]
+
+    return match
+
+
+def _compare_dates(first, second, compare):
+    if first is None and second is None:
+        return False
+
+    first_date = _get_date(first)
+    second_date = _get_date(second)
+    if first_date is None or second_date is None:
+        return False
+
+    return compare(first_date, second_date)
+
+
+def _get_epoch(d):
+    if d is None:
+        return None
+
+    epoch = int(d)
+    if len(str(d)) >= 11:
+        epoch //= 1000
+    return epoch
+
+
+def _get_date(d):
+    epoch = _get_epoch(d)
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch)
@@ -5,12 +5,13 @@ from typing import Optional, Dict, Set
 
 from .constants import Const
 from .sdk_flags import _SDKFlags
+from .spec_compiler import _Spec, compile_spec, link_specs, relink_reused
 from .utils import djb2_hash
 
 from .evaluation_details import EvaluationReason
 from .statsig_error_boundary import _StatsigErrorBoundary
 from .statsig_errors import StatsigValueError, StatsigNameError
-from .statsig_network import _StatsigNetwork
+from .statsig_network import NOT_MODIFIED, _StatsigNetwork
 from .statsig_options import StatsigOptions
 from .thread_util import spawn_background_thread, THREAD_JOIN_TIMEOUT
 from .diagnostics import Context, Diagnostics, Marker, Key
@@ -20,6 +21,72 @@ RULESETS_SYNC_INTERVAL = 10
 IDLISTS_SYNC_INTERVAL = 60
 STORAGE_ADAPTER_KEY = "statsig.cache"
 SYNC_OUTDATED_MAX_S = 120
+# where a delta payload lists the names it deletes, per list of specs
+DELTA_DELETIONS = {
+    "feature_gates": "deleted_gates",
+    "dynamic_configs": "deleted_configs",
+    "layer_configs": "deleted_layers",
+}
+
+
+class _SpecSnapshot:
+    """Everything one sync produced.
+
+    A snapshot is never modified once _SpecStore publishes it; each sync builds a new one
+    and swaps it in with a single assignment. A reader holding a snapshot therefore sees
+    gates, configs, layers and their links all from the same sync, without locking.
+    payload is the full download_config_specs payload the snapshot was built from, which
+    delta payloads are merged into. Its entries are the compiled specs' sources.
+    """
+
+    __slots__ = ("gates", "configs", "layers", "experiment_to_layer", "sdk_keys_to_app_ids",
+                 "hashed_sdk_keys_to_app_ids", "unsupported_configs", "last_update_time", "payload")
+
+    def __init__(self, gates: Optional[Dict[str, _Spec]] = None, configs: Optional[Dict[str, _Spec]] = None,
+                 layers: Optional[Dict[str, _Spec]] = None, experiment_to_layer: Optional[Dict[str, str]] = None,
+                 sdk_keys_to_app_ids: Optional[Dict[str, str]] = None,
+                 hashed_sdk_keys_to_app_ids: Optional[Dict[str, str]] = None,
+                 unsupported_configs: Optional[Set[str]] = None, last_update_time: int = 0,
+                 payload: Optional[dict] = None):
+        self.gates: Dict[str, _Spec] = gates or {}
+        self.configs: Dict[str, _Spec] = configs or {}
+        self.layers: Dict[str, _Spec] = layers or {}
+        self.experiment_to_layer: Dict[str, str] = experiment_to_layer or {}
+        self.sdk_keys_to_app_ids: Dict[str, str] = sdk_keys_to_app_ids or {}
+        self.hashed_sdk_keys_to_app_ids: Dict[str, str] = hashed_sdk_keys_to_app_ids or {}
+        self.unsupported_configs: Set[str] = unsupported_configs or set()
+        self.last_update_time = last_update_time
+        self.payload: dict = payload or {}
+
+    def get_gate(self, name: str):
+        return self.gates.get(name)
+
+    def get_all_gates(self):
+        return self.gates
+
+    def get_config(self, name: str):
+        return self.configs.get(name)
+
+    def get_all_configs(self):
+        return self.configs
+
+    def get_layer(self, name: str):
+        return self.layers.get(name)
+
+    def get_all_layers(self):
+        return self.layers
+
+    def get_layer_name_for_experiment(self, experiment_name: str):
+        return self.experiment_to_layer.get(experiment_name)
+
+    def get_target_app_for_sdk_key(self, sdk_key=None):
+        if sdk_key is None:
+            return None
+        target_app_id = self.hashed_sdk_keys_to_app_ids.get(djb2_hash(sdk_key))
+        if target_app_id is not None:
+            return target_app_id
+        return self.sdk_keys_to_app_ids.get(sdk_key)
+
 
 class _SpecStore:
     _background_download_configs: Optional[threading.Thread]
@@ -27,7 +94,7 @@ class _SpecStore:
 
     def __init__(self, network: _StatsigNetwork, options: StatsigOptions, statsig_metadata: dict,
                  error_boundary: _StatsigErrorBoundary, shutdown_event: threading.Event, sdk_key: str, diagnostics: Diagnostics):
-        self.last_update_time = 0
+        self._specs = _SpecSnapshot()
         self.initial_update_time = 0
         self.init_reason = EvaluationReason.uninitialized
         self._initialized = False
@@ -43,15 +110,15 @@ class _SpecStore:
         self._sync_failure_count = 0
         self._sdk_key = sdk_key
 
-        self._configs: Dict[str, Dict] = {}
-        self._gates: Dict[str, Dict] = {}
-        self._layers: Dict[str, Dict] = {}
-        self._experiment_to_layer: Dict[str, str] = {}
-        self._sdk_keys_to_app_ids: Dict[str, str] = {}
-        self._hashed_sdk_keys_to_app_ids: Dict[str, str] = {}
-
         self._id_lists: Dict[str, dict] = {}
-        self.unsupported_configs: Set[str] = set()
+
+    @property
+    def last_update_time(self) -> int:
+        return self._specs.last_update_time
+
+    @property
+    def unsupported_configs(self) -> Set[str]:
+        return self._specs.unsupported_configs
 
     def _is_specs_json_valid(self, specs_json):
         if specs_json is None or specs_json.get("time") is None:
@@ -98,26 +165,29 @@ class _SpecStore:
 
         self._executor.shutdown(wait=False)
 
+    def get_snapshot(self) -> _SpecSnapshot:
+        return self._specs
+
     def get_gate(self, name: str):
-        return self._gates.get(name)
+        return self._specs.get_gate(name)
 
     def get_all_gates(self):
-        return self._gates
+        return self._specs.get_all_gates()
 
     def get_config(self, name: str):
-        return self._configs.get(name)
+        return self._specs.get_config(name)
 
     def get_all_configs(self):
-        return self._configs
+        return self._specs.get_all_configs()
 
     def get_layer(self, name: str):
-        return self._layers.get(name)
+        return self._specs.get_layer(name)
 
     def get_all_layers(self):
-        return self._layers
+        return self._specs.get_all_layers()
 
     def get_layer_name_for_experiment(self, experiment_name: str):
-        return self._experiment_to_layer.get(experiment_name)
+        return self._specs.get_layer_name_for_experiment(experiment_name)
 
     def get_id_list(self, id_list_name):
         return self._id_lists.get(id_list_name)
@@ -126,12 +196,7 @@ class _SpecStore:
         return self._id_lists
 
     def get_target_app_for_sdk_key(self, sdk_key=None):
-        if sdk_key is None:
-            return None
-        target_app_id = self._hashed_sdk_keys_to_app_ids.get(djb2_hash(sdk_key))
-        if target_app_id is not None:
-            return target_app_id
-        return self._sdk_keys_to_app_ids.get(sdk_key)
+        return self._specs.get_target_app_for_sdk_key(sdk_key)
 
     def _initialize_specs(self):
         if self._options.data_store is not None:
@@ -157,47 +222,57 @@ class _SpecStore:
             return False
         if specs_json.get("time", 0) < self.last_update_time:
             return False
-        copy = json.dumps(specs_json)
+        if specs_json.get("is_delta", False) is True:
+            specs_json = self._merge_delta(specs_json)
+            if specs_json is None:
+                self._log_process("Failed to process specs")
+                return False
         if callable(self._options.rules_updated_callback):
-            self._options.rules_updated_callback(copy)
+            self._options.rules_updated_callback(json.dumps(specs_json))
+
+        unsupported_configs: Set[str] = set()
+        # specs whose entry is unchanged since the last sync keep their compiled form
+        reused: Set[_Spec] = set()
 
-        def get_parsed_specs(key: str):
+        payload = dict(specs_json)
+
+        def get_parsed_specs(key: str, previous: Dict[str, _Spec]):
             parsed = {}
+            entries = []
             for spec in specs_json.get(key, []):
                 spec_name = spec.get("name")
-                if spec_name is not None:
-                    parsed[spec_name] = spec
-                parse_target_value_map_from_spec(spec, parsed)
+                compiled = previous.get(spec_name)
+                if compiled is not None and compiled.source == spec:
+                    # the payload keeps the entry the spec was compiled from, not an equal copy
+                    entries.append(compiled.source)
+                    reused.add(compiled)
+                    parsed[spec_name] = compiled
+                    continue
+                entries.append(spec)
+                if spec_name is None:
+                    continue
+                if not is_spec_supported(spec):
+                    unsupported_configs.add(spec_name)
+                    continue
+                parsed[spec_name] = compile_spec(spec, self._options._environment)
+            payload[key] = entries
             return parsed
 
-        def parse_target_value_map_from_spec(spec, parsed):
+        def is_spec_supported(spec):
             for rule in spec.get("rules", []):
-                for i, cond in enumerate(rule.get("conditions", [])):
+                for cond in rule.get("conditions", []):
                     op = cond.get("operator", None)
                     cond_type = cond.get("type", None)
-                    if op is not None:
-                        op = op.lower()
-                        if op not in Const.SUPPORTED_OPERATORS:
-                            self.unsupported_configs.add(spec.get("name"))
-                            del parsed[spec.get("name")]
-                    if cond_type is not None:
-                        cond_type = cond_type.lower()
-                        if cond_type not in Const.SUPPORTED_CONDITION_TYPES:
-                            self.unsupported_configs.add(spec.get("name"))
-                            del parsed[spec.get("name")]
-
-                    if op in ('any', 'none') and cond_type == "user_bucket":
-                        user_bucket_array = cond.get("targetValue", [])
-                        if len(user_bucket_array) == 0:
-                            return
-                        rule["conditions"][i]["user_bucket"] = {}
-                        for val in user_bucket_array:
-                            rule["conditions"][i]["user_bucket"][int(val)] = True
-
-        self.unsupported_configs.clear()
-        new_gates = get_parsed_specs("feature_gates")
-        new_configs = get_parsed_specs("dynamic_configs")
-        new_layers = get_parsed_specs("layer_configs")
+                    if op is not None and op.lower() not in Const.SUPPORTED_OPERATORS:
+                        return False
+                    if cond_type is not None and cond_type.lower() not in Const.SUPPORTED_CONDITION_TYPES:
+                        return False
+            return True
+
+        previous = self._specs
+        new_gates = get_parsed_specs("feature_gates", previous.gates)
+        new_configs = get_parsed_specs("dynamic_configs", previous.configs)
+        new_layers = get_parsed_specs("layer_configs", previous.layers)
 
         new_experiment_to_layer = {}
         layers_dict = specs_json.get("layers", {})
@@ -206,13 +281,25 @@ class _SpecStore:
             for experiment_name in experiments:
                 new_experiment_to_layer[experiment_name] = layer_name
 
-        self._sdk_keys_to_app_ids = specs_json.get("sdk_keys_to_app_ids", {})
-        self._hashed_sdk_keys_to_app_ids = specs_json.get("hashed_sdk_keys_to_app_ids", {})
-        self._gates = new_gates
-        self._configs = new_configs
-        self._layers = new_layers
-        self._experiment_to_layer = new_experiment_to_layer
-        self.last_update_time = specs_json.get("time", 0)
+        relink_reused(new_gates, new_configs, new_layers, new_experiment_to_layer, reused, self._options._environment)
+        missing, cyclic = link_specs(new_gates, new_configs, new_layers, new_experiment_to_layer, reused)
+        if len(missing) > 0:
+            globals.logger.debug(f"Specs reference missing gates or configs: {sorted(missing)}")
+        if len(cyclic) > 0:
+            globals.logger.warning(
+                f"Specs reference each other in a cycle and fail to evaluate wherever it is reached: {sorted(cyclic)}")
+
+        self._specs = _SpecSnapshot(
+            new_gates,
+            new_configs,
+            new_layers,
+            new_experiment_to_layer,
+            specs_json.get("sdk_keys_to_app_ids", {}),
+            specs_json.get("hashed_sdk_keys_to_app_ids", {}),
+            unsupported_configs,
+            specs_json.get("time", 0),
+            payload,
+        )
 
         flags = specs_json.get("sdk_flags", {})
         _SDKFlags.set_flags(flags)
@@ -223,6 +310,35 @@ class _SpecStore:
         self._log_process("Done processing specs")
         return True
 
+    def _merge_delta(self, delta: dict) -> Optional[dict]:
+        """Applies a delta payload's upserts and deletions to the last full payload.
+
+        Specs and layers a delta includes replace the ones with the same name, and names
+        listed under the DELTA_DELETIONS fields are removed, deleted_layers taking the
+        layer's experiment list with it. Fields the delta leaves out keep their last value.
+        """
+        base = self._specs.payload
+        if not base:
+            globals.logger.warning("Received a delta of specs before any full set of specs")
+            return None
+
+        merged = {**base, **delta}
+        merged.pop("is_delta", None)
+        for key, deleted_key in DELTA_DELETIONS.items():
+            merged.pop(deleted_key, None)
+            entries = {spec.get("name"): spec for spec in base.get(key, [])}
+            for spec in delta.get(key, []):
+                entries[spec.get("name")] = spec
+            for name in delta.get(deleted_key, []):
+                entries.pop(name, None)
+            merged[key] = list(entries.values())
+
+        layers = {**base.get("layers", {}), **delta.get("layers", {})}
+        for name in delta.get(DELTA_DELETIONS["layer_configs"], []):
+            layers.pop(name, None)
+        merged["layers"] = layers
+        return merged
+
     def _bootstrap_config_specs(self):
         self._diagnostics.add_marker(Marker().bootstrap().process().start())
         if self._options.bootstrap_values is None:
@@ -279,21 +395,36 @@ class _SpecStore:
             if specs is None:
                 self._sync_failure_count += 1
                 return
+            if specs is NOT_MODIFIED:
+                self._log_process("Specs not modified")
+                self._diagnostics.add_marker(Marker().download_config_specs().process().start())
+                self._diagnostics.add_marker(Marker().download_config_specs().process().end(
+                    {'success': True, 'reason': 'not_modified'}))
+                return
 
-            self.download_config_spec_process(specs)
+            applied = False
+            try:
+                applied = self.download_config_spec_process(specs)
+            finally:
+                if not applied:
+                    # otherwise the server would answer 304 to the specs this store never took
+                    self._network.clear_config_specs_validators()
         except Exception as e:
             raise e
         finally:
             self._diagnostics.log_diagnostics(Context.CONFIG_SYNC, Key.DOWNLOAD_CONFIG_SPECS)
 
-    def download_config_spec_process(self, specs):
+    def download_config_spec_process(self, specs) -> bool:
+        """Returns whether the store is up to date with specs, either applying them or having no updates"""
         try:
             self._diagnostics.add_marker(Marker().download_config_specs().process().start())
 
             self._log_process("Done loading specs")
             if self._process_specs(specs):
-                self._save_to_storage_adapter(specs)
+                self._save_to_storage_adapter(self._specs.payload)
                 self.init_reason = EvaluationReason.network
+                return True
+            return specs.get("has_updates", False) is False
         except Exception as e:
             raise e
         finally:
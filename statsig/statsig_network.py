@@ -2,8 +2,10 @@ import json
 import time
 from io import BytesIO
 import gzip
+from typing import Optional, Tuple
 import requests
 from .diagnostics import Diagnostics, Marker
+from .json_stream import load_object_stream
 from .sdk_flags import _SDKFlags
 from .statsig_options import StatsigOptions
 from .statsig_error_boundary import _StatsigErrorBoundary
@@ -13,6 +15,10 @@ from . import globals
 REQUEST_TIMEOUT = 20
 STATSIG_API = "https://statsigapi.net/v1/"
 STATSIG_CDN = "https://api.statsigcdn.com/v1/"
+CONFIG_SPECS_CHUNK_SIZE = 64 * 1024
+NOT_MODIFIED_CODE = 304
+# returned by download_config_specs when the specs are unchanged since the last download
+NOT_MODIFIED = object()
 
 
 class _StatsigNetwork:
@@ -43,15 +49,55 @@ class _StatsigNetwork:
         self.__statsig_metadata = statsig_metadata
         self.__diagnostics = diagnostics
         self.__request_count = 0
+        # sinceTime and conditional headers from the last download_config_specs response
+        self.__config_specs_validators: Optional[Tuple[int, dict]] = None
 
     def download_config_specs(self, since_time=0, log_on_exception=False, timeout=None):
+        headers = None
+        if self.__config_specs_validators is not None:
+            validated_since_time, validators = self.__config_specs_validators
+            if validated_since_time == since_time:
+                headers = validators
         response = self._get_request(
             url=f"{self.__api_for_download_config_specs}download_config_specs/{self.__sdk_key}.json?sinceTime={since_time}",
-            headers=None, log_on_exception=log_on_exception, timeout=timeout,
-            tag="download_config_specs")
-        if response is not None and self._is_success_code(response.status_code):
-            return response.json() or {}
-        return None
+            headers=headers, log_on_exception=log_on_exception, timeout=timeout,
+            tag="download_config_specs", stream=True)
+        if response is None:
+            return None
+        try:
+            if response.status_code == NOT_MODIFIED_CODE and headers is not None:
+                return NOT_MODIFIED
+            if not self._is_success_code(response.status_code):
+                return None
+            try:
+                # decoded as the body arrives, so the full response text is never held at once
+                specs = load_object_stream(response.iter_content(CONFIG_SPECS_CHUNK_SIZE))
+            except requests.exceptions.RequestException as err:
+                globals.logger.warning("Failed to read download_config_specs response: %s", err)
+                if log_on_exception:
+                    self.__error_boundary.log_exception(
+                        "request:download_config_specs", err,
+                        {"timeoutMs": (timeout or self.__req_timeout) * 1000, "httpMethod": "GET"})
+                return None
+            self.__config_specs_validators = self.__get_validators(since_time, response)
+            return specs or {}
+        finally:
+            response.close()
+
+    def clear_config_specs_validators(self):
+        """Makes the next download unconditional, for when the last response was not applied"""
+        self.__config_specs_validators = None
+
+    def __get_validators(self, since_time, response):
+        # validators only hold for the URL they came from, which changes with sinceTime
+        headers = {}
+        etag = response.headers.get("ETag")
+        if etag:
+            headers["If-None-Match"] = etag
+        last_modified = response.headers.get("Last-Modified")
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return (since_time, headers) if headers else None
 
     def get_id_lists(self, log_on_exception=False, timeout=None):
         response = self._post_request(
@@ -92,11 +138,12 @@ class _StatsigNetwork:
         return self._request('POST', url, headers, payload, log_on_exception, timeout, zipped, tag)
 
     def _get_request(
-            self, url, headers, log_on_exception=False, timeout=None, zipped=None, tag=None):
-        return self._request('GET', url, headers, None, log_on_exception, timeout, zipped, tag)
+            self, url, headers, log_on_exception=False, timeout=None, zipped=None, tag=None,
+            stream=False):
+        return self._request('GET', url, headers, None, log_on_exception, timeout, zipped, tag, stream)
 
     def _request(self, method, url, headers=None, payload=None, log_on_exception=False,
-                 timeout=None, zipped=False, tag=None):
+                 timeout=None, zipped=False, tag=None, stream=False):
         if self.__local_mode:
             globals.logger.debug("Using local mode. Dropping network request")
             return None
@@ -141,6 +188,7 @@ class _StatsigNetwork:
                 data=payload,
                 headers=headers,
                 timeout=timeout,
+                stream=stream,
             )
 
             if create_marker is not None:
@@ -154,7 +202,8 @@ class _StatsigNetwork:
                     }
                 ))
 
-            if response.status_code < 200 or response.status_code >= 300:
+            if (response.status_code < 200 or response.status_code >= 300) \
+                    and response.status_code != NOT_MODIFIED_CODE:
                 clean_url = url.replace(self.__sdk_key, "********")
                 globals.logger.warning(
                     "Request to %s failed with code %d", clean_url, response.status_code)
@@ -13,6 +13,8 @@ DEFAULT_IDLIST_SYNC_INTERVAL = 60
 DEFAULT_EVENT_QUEUE_SIZE = 500
 DEFAULT_IDLISTS_THREAD_LIMIT = 3
 DEFAULT_LOGGING_INTERVAL = 60
+DEFAULT_USER_AGENT_CACHE_SIZE = 1000
+DEFAULT_IP_COUNTRY_CACHE_SIZE = 1000
 
 
 class StatsigOptions:
@@ -39,6 +41,9 @@ class StatsigOptions:
         enable_debug_logs = False,
         disable_all_logging = False,
         evaluation_callback: Optional[Callable[[Union[Layer, DynamicConfig, FeatureGate]], None]] = None,
+        user_agent_cache_size: int = DEFAULT_USER_AGENT_CACHE_SIZE,
+        ip_country_cache_size: int = DEFAULT_IP_COUNTRY_CACHE_SIZE,
+        short_circuit_rules: bool = False,
     ):
         self.data_store = data_store
         self._environment: Union[None, dict] = None
@@ -72,6 +77,12 @@ class StatsigOptions:
         self.enable_debug_logs = enable_debug_logs
         self.disable_all_logging = disable_all_logging
         self.evaluation_callback = evaluation_callback
+        self.user_agent_cache_size = user_agent_cache_size
+        self.ip_country_cache_size = ip_country_cache_size
+        # stop evaluating a rule's conditions at the first one that fails. Nested gate
+        # conditions still run so secondary exposures are unchanged, but a skipped condition
+        # can no longer turn the rule into an error result
+        self.short_circuit_rules = short_circuit_rules
         self._set_logging_copy()
 
     def get_logging_copy(self):
@@ -113,4 +124,10 @@ class StatsigOptions:
             logging_copy["disable_diagnostics"] = self.disable_diagnostics
         if self.event_queue_size != DEFAULT_EVENT_QUEUE_SIZE:
             logging_copy["event_queue_size"] = self.event_queue_size
+        if self.user_agent_cache_size != DEFAULT_USER_AGENT_CACHE_SIZE:
+            logging_copy["user_agent_cache_size"] = self.user_agent_cache_size
+        if self.ip_country_cache_size != DEFAULT_IP_COUNTRY_CACHE_SIZE:
+            logging_copy["ip_country_cache_size"] = self.ip_country_cache_size
+        if self.short_circuit_rules:
+            logging_copy["short_circuit_rules"] = self.short_circuit_rules
         self.logging_copy = logging_copy
@@ -1,4 +1,3 @@
-import dataclasses
 import threading
 from typing import Optional, Union
 from .feature_gate import FeatureGate
@@ -11,6 +10,7 @@ from .statsig_user import StatsigUser
 from .spec_store import _SpecStore
 from .statsig_error_boundary import _StatsigErrorBoundary
 from .evaluator import _Evaluator
+from .evaluation_context import _EvaluationContext
 from .statsig_network import _StatsigNetwork
 from .statsig_logger import _StatsigLogger
 from .dynamic_config import DynamicConfig
@@ -40,6 +40,8 @@ class StatsigServer:
         self._initialized = False
 
         self._errorBoundary = _StatsigErrorBoundary()
+        # bound once instead of a closure per get_layer call
+        self.__layer_exposure_logger = self.__log_layer_parameter_exposure
 
     def initialize(self, sdkKey: str, options: Optional[StatsigOptions] = None):
         if self._initialized:
@@ -93,7 +95,7 @@ class StatsigServer:
                 sdk_key,
                 diagnostics
             )
-            self._evaluator = _Evaluator(self._spec_store)
+            self._evaluator = _Evaluator(self._spec_store, self._options)
 
             self._spec_store.initialize()
             self._initialized = True
@@ -245,13 +247,8 @@ class StatsigServer:
                 return layer
 
             normal_user = self.__normalize_user(user)
-            result = self._evaluator.get_layer(normal_user, layer_name)
-
-            def log_func(layer: Layer, parameter_name: str):
-                if log_exposure:
-                    self._logger.log_layer_exposure(
-                        normal_user, layer, parameter_name, result
-                    )
+            context = _EvaluationContext(normal_user, track_exposures=log_exposure)
+            result = self._evaluator.get_layer(normal_user, layer_name, context)
 
             layer =  Layer._create(
                 layer_name,
@@ -259,8 +256,10 @@ class StatsigServer:
                 result.rule_id,
                 result.group_name,
                 result.allocated_experiment,
-                log_func,
-                evaluation_details=result.evaluation_details
+                self.__layer_exposure_logger if log_exposure else None,
+                evaluation_details=result.evaluation_details,
+                user=normal_user,
+                config_evaluation=result
             )
             self.safe_eval_callback(layer)
             return layer
@@ -288,6 +287,11 @@ class StatsigServer:
             user, layer, parameter_name, result, is_manual_exposure=True
         )
 
+    def __log_layer_parameter_exposure(self, layer: Layer, parameter_name: str):
+        self._logger.log_layer_exposure(
+            layer._user, layer, parameter_name, layer._config_evaluation
+        )
+
     def safe_eval_callback(self, config: Union[FeatureGate, DynamicConfig, Layer]):
         if self._options.evaluation_callback is not None:
             self._options.evaluation_callback(config)
@@ -404,17 +408,22 @@ class StatsigServer:
 
     def evaluate_all(self, user: StatsigUser):
         def task():
+            normal_user = self.__normalize_user(user)
+            # one context for the whole sweep so shared nested gates are evaluated once, all
+            # specs come from one sync, and nothing is logged so secondary exposures are not built
+            specs = self._spec_store.get_snapshot()
+            context = _EvaluationContext(normal_user, track_exposures=False, specs=specs)
             all_gates = {}
-            for gate in self._spec_store.get_all_gates():
-                result = self.__check_gate(user, gate, False)
+            for gate in specs.get_all_gates():
+                result = self._evaluator.check_gate(normal_user, gate, context)
                 all_gates[gate] = {
                     "value": result.boolean_value,
                     "rule_id": result.rule_id,
                 }
 
             all_configs = {}
-            for config in self._spec_store.get_all_configs():
-                result = self.__get_config(user, config, False)
+            for config in specs.get_all_configs():
+                result = self._evaluator.get_config(normal_user, config, context)
                 all_configs[config] = {
                     "value": result.json_value,
                     "rule_id": result.rule_id,
@@ -454,7 +463,7 @@ class StatsigServer:
 
     def __check_gate(self, user: StatsigUser, gate_name: str, log_exposure=True):
         user = self.__normalize_user(user)
-        result = self._evaluator.check_gate(user, gate_name)
+        result = self._evaluator.check_gate(user, gate_name, _EvaluationContext(user, track_exposures=log_exposure))
         if log_exposure:
             self._logger.log_gate_exposure(
                 user,
@@ -469,7 +478,7 @@ class StatsigServer:
     def __get_config(self, user: StatsigUser, config_name: str, log_exposure=True):
         user = self.__normalize_user(user)
 
-        result = self._evaluator.get_config(user, config_name)
+        result = self._evaluator.get_config(user, config_name, _EvaluationContext(user, track_exposures=log_exposure))
         if log_exposure:
             self._logger.log_config_exposure(
                 user,
@@ -481,10 +490,7 @@ class StatsigServer:
         return result
 
     def __normalize_user(self, user):
-        userCopy = dataclasses.replace(user)
-        if self._options is not None and self._options._environment is not None:
-            userCopy._statsig_environment = self._options._environment
-        return userCopy
+        return user._normalized(None if self._options is None else self._options._environment)
 
     def _sync(self, sync_func, interval):
         while True:
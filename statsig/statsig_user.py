@@ -1,4 +1,6 @@
+import dataclasses
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import Optional
 
 from .statsig_environment_tier import StatsigEnvironmentTier
@@ -39,6 +41,27 @@ class StatsigUser:
         if self.custom_ids is not None:
             self.custom_ids = {str(key): str(value) for key, value in self.custom_ids.items()}
 
+    def _normalized(self, environment: Optional[dict] = None) -> "StatsigUser":
+        """Returns a copy of this user with environment attached when one is given.
+
+        The copy is kept on the user and handed out again until one of its fields changes,
+        so checking the same user many times only normalizes it once.
+        """
+        values = _field_values(self)
+        cached = self.__dict__.get("_statsig_normalized")
+        if cached is not None:
+            cached_environment, cached_values, normalized = cached
+            # __post_init__ rebuilt the copy's custom_ids, so compare its contents too
+            if cached_environment is environment and cached_values == values \
+                    and (self.custom_ids is None or normalized.custom_ids == self.custom_ids):
+                return normalized
+
+        normalized = dataclasses.replace(self)
+        if environment is not None:
+            normalized._statsig_environment = environment
+        self.__dict__["_statsig_normalized"] = (environment, values, normalized)
+        return normalized
+
     def to_dict(self, for_evaluation=False):
         user_nullable = {
             'userID': str_or_none(self.user_id),
@@ -84,3 +107,6 @@ class StatsigUser:
             return {'tier': tier.value}
 
         return None
+
+
+_field_values = attrgetter(*(field.name for field in dataclasses.fields(StatsigUser)))
@@ -0,0 +1,104 @@
+from collections import deque
+from typing import Iterable, List
+
+# Below these many targets the builtin str methods, which loop in C, beat walking the
+# automatons in Python
+PREFIX_TRIE_MIN_TARGETS = 128
+AHO_CORASICK_MIN_TARGETS = 32
+
+_END = ""
+
+
+class _PrefixTrie:
+    """Matches values that start with any of the targets in a single pass over the value.
+
+    Built with reverse=True it matches values that end with any of the targets instead.
+    """
+
+    def __init__(self, targets: Iterable[str], reverse=False):
+        self._reverse = reverse
+        self._root: dict = {}
+        for target in targets:
+            node = self._root
+            for ch in (reversed(target) if reverse else target):
+                node = node.setdefault(ch, {})
+            node[_END] = True
+
+    def matches(self, value: str) -> bool:
+        node = self._root
+        if _END in node:
+            return True
+        for ch in (reversed(value) if self._reverse else value):
+            child = node.get(ch)
+            if child is None:
+                return False
+            if _END in child:
+                return True
+            node = child
+        return False
+
+
+class _AhoCorasick:
+    """Matches values that contain any of the targets in a single pass over the value"""
+
+    def __init__(self, targets: Iterable[str]):
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[bool] = [False]
+
+        for target in targets:
+            state = 0
+            for ch in target:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(False)
+                state = next_state
+            self._out[state] = True
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail != 0 and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._out[next_state] = self._out[next_state] or self._out[self._fail[next_state]]
+
+    def matches(self, value: str) -> bool:
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        if out[0]:
+            return True
+        state = 0
+        for ch in value:
+            while state != 0 and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                return True
+        return False
+
+
+def starts_with_any(targets: tuple):
+    if len(targets) < PREFIX_TRIE_MIN_TARGETS:
+        return lambda value: value.startswith(targets)
+    return _PrefixTrie(targets).matches
+
+
+def ends_with_any(targets: tuple):
+    if len(targets) < PREFIX_TRIE_MIN_TARGETS:
+        return lambda value: value.endswith(targets)
+    return _PrefixTrie(targets, reverse=True).matches
+
+
+def contains_any(targets: tuple):
+    if len(targets) < AHO_CORASICK_MIN_TARGETS:
+        return lambda value: any(t in value for t in targets)
+    return _AhoCorasick(targets).matches
@@ -1,3 +1,4 @@
+import json
 import re
 from typing import Callable, Union
 from urllib.parse import urlparse, ParseResult
@@ -20,6 +21,15 @@ class NetworkStub:
         def json(self):
             return self._json
 
+        def iter_content(self, chunk_size=1, decode_unicode=False):
+            body = self.text if isinstance(self.text, str) else json.dumps(self._json)
+            body = body.encode("utf-8")
+            for i in range(0, len(body), chunk_size):
+                yield body[i:i + chunk_size]
+
+        def close(self):
+            pass
+
     def __init__(self, host: str):
         self.host = host
         self._stubs = {}
@@ -39,13 +49,14 @@ class NetworkStub:
         }
 
     def stub_request_with_function(self, path, response_code: Union[int, Callable[[str, dict], int]],
-                                   response_func: Callable[[str, dict], object]):
+                                   response_func: Callable[[str, dict], object], response_headers=None):
         if not callable(response_func):
             raise "Must provide a function"
 
         self._stubs[path] = {
             "response_code": response_code,
-            "response_func": response_func
+            "response_func": response_func,
+            "response_headers": response_headers,
         }
 
     def mock(*args, **kwargs):
@@ -68,11 +79,11 @@ class NetworkStub:
                 if callable(response_code):
                     response_code = response_code(url, kwargs)
 
-                headers = {}
+                headers = dict(stub_data.get("response_headers") or {})
                 if isinstance(response_body, str):
                     headers["content-length"] = len(response_body)
 
                 return NetworkStub.StubResponse(
-                    stub_data["response_code"], response_body, headers)
+                    response_code, response_body, headers)
 
         return NetworkStub.StubResponse(404)
@@ -0,0 +1,31 @@
+PUBLIC = {"type": "public"}
+
+
+def rule(rule_id, conditions, pass_percentage=100, return_value=True, **fields):
+    return {"name": rule_id, "id": rule_id, "salt": rule_id, "passPercentage": pass_percentage,
+            "returnValue": return_value, "conditions": conditions, **fields}
+
+
+def gate(name, rules, **fields):
+    return {"name": name, "type": "feature_gate", "entity": "feature_gate", "salt": name, "enabled": True,
+            "defaultValue": False, "rules": rules, **fields}
+
+
+def config(name, default_value, rules=(), **fields):
+    return {"name": name, "type": "dynamic_config", "entity": "experiment", "salt": name, "enabled": True,
+            "defaultValue": default_value, "rules": list(rules), **fields}
+
+
+def layer(name, default_value, rules=(), **fields):
+    return {"name": name, "type": "dynamic_config", "entity": "layer", "salt": name, "enabled": True,
+            "defaultValue": default_value, "rules": list(rules), **fields}
+
+
+def delegate_rule(rule_id, experiment):
+    return rule(rule_id, [PUBLIC], return_value={}, configDelegate=experiment)
+
+
+def specs(feature_gates=(), dynamic_configs=(), layer_configs=(), time=1, **fields):
+    """A download_config_specs payload holding the given specs"""
+    return {"feature_gates": list(feature_gates), "dynamic_configs": list(dynamic_configs),
+            "layer_configs": list(layer_configs), "has_updates": True, "time": time, **fields}
@@ -0,0 +1,91 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from statsig import StatsigOptions, StatsigServer
+from network_stub import NetworkStub
+
+with open(os.path.join(os.path.abspath(os.path.dirname(__file__)), '../testdata/download_config_specs.json')) as r:
+    CONFIG_SPECS_RESPONSE = json.loads(r.read())
+
+_api_override = "http://conditional-specs-test"
+_network_stub = NetworkStub(_api_override)
+_etag = '"specs-v1"'
+
+
+class TestConditionalSpecs(unittest.TestCase):
+
+    @patch('requests.request', side_effect=_network_stub.mock)
+    def setUp(self, mock_request):
+        self.requests = []
+        self.updates = []
+        self.updated_specs = None
+
+        def status(url, kwargs):
+            return 304 if kwargs["headers"].get("If-None-Match") == _etag else 200
+
+        def download_config_specs(url, **kwargs):
+            self.requests.append((url.query, kwargs["headers"].get("If-None-Match")))
+            if url.query == "sinceTime=0":
+                return CONFIG_SPECS_RESPONSE
+            if self.updated_specs is not None:
+                return self.updated_specs
+            return {"has_updates": False, "time": CONFIG_SPECS_RESPONSE["time"]}
+
+        _network_stub.reset()
+        _network_stub.stub_request_with_function("download_config_specs/.*", status, download_config_specs,
+                                                 response_headers={"ETag": _etag})
+        _network_stub.stub_request_with_value("get_id_lists", 200, {})
+
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(
+            api=_api_override, rulesets_sync_interval=100000, rules_updated_callback=self.updates.append))
+        self.store = self.server._spec_store
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    @patch('requests.request', side_effect=_network_stub.mock)
+    def test_unchanged_specs_skip_processing(self, mock_request):
+        since = f"sinceTime={CONFIG_SPECS_RESPONSE['time']}"
+        snapshot = self.store.get_snapshot()
+        self.store._download_config_specs()
+        with patch.object(self.store, "_process_specs", wraps=self.store._process_specs) as process_specs, \
+                patch.object(self.store._diagnostics, "add_marker", wraps=self.store._diagnostics.add_marker) as add_marker:
+            self.store._download_config_specs()
+            self.store._download_config_specs()
+
+        # validators are only sent back to the URL they came from
+        self.assertEqual(self.requests, [("sinceTime=0", None), (since, None), (since, _etag), (since, _etag)])
+        process_specs.assert_not_called()
+        self.assertIs(self.store.get_snapshot(), snapshot)
+        self.assertEqual(len(self.updates), 1)
+        self.assertEqual(self.store._sync_failure_count, 0)
+
+        skipped = [m.to_dict() for (m,), _ in add_marker.call_args_list if m.reason == "not_modified"]
+        self.assertEqual(len(skipped), 2)
+        self.assertEqual(skipped[0]["key"], "download_config_specs")
+        self.assertEqual(skipped[0]["step"], "process")
+        self.assertTrue(skipped[0]["success"])
+        statuses = [m.statusCode for (m,), _ in add_marker.call_args_list if m.statusCode is not None]
+        self.assertEqual(statuses, [304, 304])
+
+    @patch('requests.request', side_effect=_network_stub.mock)
+    def test_validators_dropped_when_specs_not_applied(self, mock_request):
+        since = f"sinceTime={CONFIG_SPECS_RESPONSE['time']}"
+        self.updated_specs = dict(CONFIG_SPECS_RESPONSE, time=CONFIG_SPECS_RESPONSE["time"] + 1)
+        with patch.object(self.store, "_process_specs", side_effect=RuntimeError("bad specs")), \
+                self.assertRaises(RuntimeError):
+            self.store._download_config_specs()
+        with patch.object(self.store, "_process_specs", return_value=False):
+            self.store._download_config_specs()
+        self.store._download_config_specs()
+
+        # a 304 would have kept the specs that were never applied
+        self.assertEqual(self.requests, [("sinceTime=0", None), (since, None), (since, None), (since, None)])
+        self.assertEqual(self.store.last_update_time, CONFIG_SPECS_RESPONSE["time"] + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
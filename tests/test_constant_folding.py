@@ -0,0 +1,74 @@
+import json
+import unittest
+from hashlib import sha256
+from unittest.mock import patch
+
+from statsig import StatsigEnvironmentTier, StatsigOptions, StatsigServer, StatsigUser
+from statsig.spec_compiler import CONDITION_USER_FIELD, compile_spec
+from spec_helpers import PUBLIC, gate, rule, specs
+
+STAGING_ONLY = {"type": "environment_field", "operator": "any", "field": "tier", "targetValue": ["staging"]}
+EMAIL = {"type": "user_field", "operator": "str_contains_any", "field": "email", "targetValue": ["@statsig.com"]}
+
+SPECS = json.dumps(specs([
+    gate("staging_everyone", [rule("staging", [PUBLIC, STAGING_ONLY])]),
+    gate("staging_employees", [rule("staging", [STAGING_ONLY, EMAIL])]),
+    gate("nobody", [rule("none", [PUBLIC], pass_percentage=0)]),
+    gate("half", [rule("half", [PUBLIC], pass_percentage=50)]),
+]))
+
+
+class TestConstantFolding(unittest.TestCase):
+
+    def test_user_independent_conditions_are_folded(self):
+        staging = {"tier": "staging"}
+        spec = compile_spec(json.loads(SPECS)["feature_gates"][1], staging)
+        rule = spec.rules[0]
+        self.assertEqual([c.type for c in rule.live_conditions], [CONDITION_USER_FIELD])
+        self.assertTrue(rule.folded_result)
+        self.assertTrue(rule.folds_environment)
+        self.assertTrue(rule.known_pass)
+
+        staging["tier"] = "production"
+        self.assertEqual(rule.environment, {"tier": "staging"})
+
+        production = compile_spec(json.loads(SPECS)["feature_gates"][1], {"tier": "production"}).rules[0]
+        self.assertFalse(production.folded_result)
+
+        half = compile_spec(json.loads(SPECS)["feature_gates"][3]).rules[0]
+        self.assertEqual(half.live_conditions, [])
+        self.assertIsNone(half.known_pass)
+
+    def test_known_pass_percentages_skip_hashing(self):
+        server = StatsigServer()
+        server.initialize("secret-key", StatsigOptions(
+            local_mode=True, bootstrap_values=SPECS, tier=StatsigEnvironmentTier.staging))
+        user = StatsigUser("u", email="a@statsig.com")
+
+        with patch("statsig.evaluator.sha256", wraps=sha256) as hashed:
+            self.assertTrue(server.check_gate(user, "staging_everyone"))
+            self.assertTrue(server.check_gate(user, "staging_employees"))
+            self.assertFalse(server.check_gate(user, "nobody"))
+            self.assertEqual(hashed.call_count, 0)
+
+            server.check_gate(user, "half")
+            self.assertEqual(hashed.call_count, 1)
+        server.shutdown()
+
+    def test_other_environments_are_still_evaluated(self):
+        server = StatsigServer()
+        server.initialize("secret-key", StatsigOptions(
+            local_mode=True, bootstrap_values=SPECS, tier=StatsigEnvironmentTier.staging))
+        evaluator = server._evaluator
+        user = StatsigUser("u", email="a@statsig.com")
+
+        self.assertFalse(evaluator.check_gate(user, "staging_employees").boolean_value)
+        user._statsig_environment = {"tier": "staging"}
+        self.assertTrue(evaluator.check_gate(user, "staging_employees").boolean_value)
+        user._statsig_environment = {"tier": "production"}
+        self.assertFalse(evaluator.check_gate(user, "staging_everyone").boolean_value)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
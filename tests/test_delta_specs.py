@@ -0,0 +1,95 @@
+import json
+import unittest
+from unittest.mock import patch
+from urllib.parse import parse_qs
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.evaluation_details import EvaluationReason
+from statsig.spec_store import _SpecSnapshot
+from network_stub import NetworkStub
+from spec_helpers import PUBLIC, config, gate, layer, rule, specs
+
+_api_override = "http://delta-specs-test"
+_network_stub = NetworkStub(_api_override)
+
+
+def _gate(name, rule_id):
+    return gate(name, [rule(rule_id, [PUBLIC])])
+
+
+FULL = specs(
+    [_gate("kept", "kept_rule"), _gate("updated", "old_rule")],
+    [config("experiment", {"v": 1}), config("removed", {"v": 1})],
+    [layer("layer", {"b": 2})],
+    time=100, layers={"layer": ["experiment"]}, sdk_flags={"flag": True})
+
+DELTA = {
+    "is_delta": True,
+    "feature_gates": [_gate("updated", "new_rule"), _gate("added", "added_rule")],
+    "deleted_configs": ["removed"],
+    "has_updates": True,
+    "time": 200,
+}
+
+
+class TestDeltaSpecs(unittest.TestCase):
+
+    @patch('requests.request', side_effect=_network_stub.mock)
+    def setUp(self, mock_request):
+        self.since_times = []
+        self.updates = []
+
+        def download_config_specs(url, **kwargs):
+            since_time = int(parse_qs(url.query)["sinceTime"][0])
+            self.since_times.append(since_time)
+            return FULL if since_time == 0 else DELTA
+
+        _network_stub.reset()
+        _network_stub.stub_request_with_function("download_config_specs/.*", 200, download_config_specs)
+        _network_stub.stub_request_with_value("get_id_lists", 200, {})
+
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(
+            api=_api_override, disable_diagnostics=True, rulesets_sync_interval=100000,
+            rules_updated_callback=self.updates.append))
+        self.store = self.server._spec_store
+        self.user = StatsigUser("u")
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    @patch('requests.request', side_effect=_network_stub.mock)
+    def test_delta_merged_into_current_specs(self, mock_request):
+        kept = self.store.get_gate("kept")
+        experiment = self.store.get_config("experiment")
+        self.store._download_config_specs()
+
+        self.assertEqual(self.since_times, [0, 100])
+        self.assertEqual(self.store.last_update_time, 200)
+        self.assertIs(self.store.get_gate("kept"), kept)
+        self.assertIs(self.store.get_config("experiment"), experiment)
+        self.assertEqual(self.server.get_feature_gate(self.user, "updated").rule_id, "new_rule")
+        self.assertTrue(self.server.check_gate(self.user, "added"))
+        self.assertEqual(self.server.get_config(self.user, "removed").evaluation_details.reason,
+                         EvaluationReason.unrecognized)
+        self.assertEqual(self.server.get_layer(self.user, "layer").get("b"), 2)
+        self.assertEqual(self.store.get_layer_name_for_experiment("experiment"), "layer")
+
+        # callbacks still see a full payload
+        merged = json.loads(self.updates[-1])
+        self.assertNotIn("is_delta", merged)
+        self.assertNotIn("deleted_configs", merged)
+        self.assertEqual([g["name"] for g in merged["feature_gates"]], ["kept", "updated", "added"])
+        self.assertEqual([c["name"] for c in merged["dynamic_configs"]], ["experiment"])
+        self.assertEqual(merged["sdk_flags"], {"flag": True})
+        self.assertEqual(merged["time"], 200)
+
+    def test_delta_without_full_specs_rejected(self):
+        self.store._specs = _SpecSnapshot()
+        self.assertFalse(self.store._process_specs(DELTA))
+        self.assertEqual(self.store.last_update_time, 0)
+        self.assertIsNone(self.store.get_gate("added"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+from hashlib import sha256
+from unittest.mock import patch
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.evaluation_context import _EvaluationContext
+from spec_helpers import gate, rule, specs
+
+
+BUCKET = {"type": "user_bucket", "operator": "lt", "field": None, "targetValue": 0,
+          "additionalValues": {"salt": "shared"}, "idType": "userID"}
+SEGMENT = {"type": "unit_id", "operator": "in_segment_list", "field": None, "targetValue": "list_1",
+           "additionalValues": {}, "idType": "userID"}
+
+SPECS = json.dumps(specs([
+    gate("many_rules", [rule("bucket_1", [BUCKET]), rule("segment_1", [SEGMENT]), rule("bucket_2", [BUCKET]),
+                        rule("segment_2", [SEGMENT]), rule("everyone", [], pass_percentage=50)]),
+]))
+
+
+class TestEvaluationContext(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(local_mode=True, bootstrap_values=SPECS))
+        self.server._spec_store._id_lists["list_1"] = {"ids": {"notauser"}}
+        self.evaluator = self.server._evaluator
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_unit_id_hashes_computed_once_per_call(self):
+        user = StatsigUser("u")
+        expected = self.evaluator.check_gate(user, "many_rules")
+
+        context = _EvaluationContext(user)
+        with patch("statsig.evaluator.sha256", wraps=sha256) as hashed:
+            for _ in range(3):
+                result = self.evaluator.check_gate(user, "many_rules", context)
+                self.assertEqual(result.boolean_value, expected.boolean_value)
+                self.assertEqual(result.rule_id, "everyone")
+
+        # one bucket hash, one ID list digest and one pass percentage hash
+        self.assertEqual(hashed.call_count, 3)
+        self.assertEqual(len(context.user_hashes), 2)
+        self.assertEqual(list(context.id_list_digests), ["u"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,9 @@ import unittest
 from unittest.mock import patch
 
 from statsig import StatsigOptions, StatsigServer, _Evaluator, StatsigUser, IDataStore
+from statsig.evaluation_context import _EvaluationContext
 from statsig.evaluation_details import EvaluationReason
+from statsig.spec_store import _SpecSnapshot
 from gzip_helpers import GzipHelpers
 from network_stub import NetworkStub
 
@@ -107,6 +109,29 @@ class TestEvaluationDetails(unittest.TestCase):
             "reason": "Unrecognized"
         })
 
+    def test_details_shared_and_stamped_once_per_call(self, mock_request, mock_time):
+        with patch("statsig.evaluation_details.time") as details_time:
+            context = _EvaluationContext(self._user)
+            gates = [self._evaluator.check_gate(self._user, name, context)
+                     for name in ["always_on_gate", "on_for_statsig_email", "not_a_gate"]]
+            config = self._evaluator.get_config(self._user, "test_config", context)
+        details_time.time.assert_not_called()
+
+        self.assertIs(gates[0].evaluation_details, gates[1].evaluation_details)
+        self.assertIs(gates[0].evaluation_details, config.evaluation_details)
+        self.assertEqual(gates[0].evaluation_details.server_time, 123 * 1000)
+        self.assertEqual(gates[2].evaluation_details.reason, EvaluationReason.unrecognized)
+        self.assertEqual(gates[2].evaluation_details.server_time, 123 * 1000)
+
+        shared = self._evaluator._create_evaluation_details(EvaluationReason.network)
+        self.assertEqual(shared.server_time, 0)
+        self.assertIs(self._evaluator._create_evaluation_details(EvaluationReason.network), shared)
+        synced = self._evaluator._create_evaluation_details(
+            EvaluationReason.network, _SpecSnapshot(last_update_time=shared.config_sync_time + 1))
+        self.assertEqual(synced.config_sync_time, shared.config_sync_time + 1)
+
+        self._server.shutdown()
+
     def test_network(self, mock_request, mock_time):
         self._server.check_gate(self._user, "always_on_gate")
         self._server.get_config(self._user, "test_config")
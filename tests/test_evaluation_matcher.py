@@ -5,6 +5,7 @@ from unittest.mock import patch
 
 from statsig import StatsigOptions, StatsigServer, _Evaluator, StatsigUser, IDataStore
 from statsig.evaluation_details import EvaluationReason
+from statsig.spec_compiler import CONDITION_PASS_GATE, OPERATOR_IN_SEGMENT_LIST, _Condition, compile_spec
 from gzip_helpers import GzipHelpers
 from network_stub import NetworkStub
 
@@ -40,36 +41,147 @@ class TestEvaluationDetails(unittest.TestCase):
         self._evaluator = server._evaluator
 
     def test_fast_match_string_in_array(self):
-        condition = { "targetValue" : ["foo", "bar", "baz"] }
+        def match(value, target):
+            condition = _Condition({"type": "user_field", "operator": "any", "targetValue": target})
+            return condition.match(value)
 
         # search for strings
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("foo", condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("bar", condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("baz", condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("gosh", condition), False)
+        self.assertEqual(match("foo", ["foo", "bar", "baz"]), True)
+        self.assertEqual(match("bar", ["foo", "bar", "baz"]), True)
+        self.assertEqual(match("baz", ["foo", "bar", "baz"]), True)
+        self.assertEqual(match("gosh", ["foo", "bar", "baz"]), False)
 
         # search for strings insensitive
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("FOO", condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("Bar", condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("baZ", condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array("gosh", condition), False)
+        self.assertEqual(match("FOO", ["foo", "bar", "baz"]), True)
+        self.assertEqual(match("Bar", ["foo", "bar", "baz"]), True)
+        self.assertEqual(match("baZ", ["foo", "bar", "baz"]), True)
+        self.assertEqual(match("gosh", ["foo", "bar", "baz"]), False)
 
         # search for integer
-        condition = { "targetValue" : [1, 2, 3, 4, 5, 6, 7] }
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array(1, condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array(4, condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array(7, condition), True)
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array(-1, condition), False)
+        target = [1, 2, 3, 4, 5, 6, 7]
+        self.assertEqual(match(1, target), True)
+        self.assertEqual(match(4, target), True)
+        self.assertEqual(match(7, target), True)
+        self.assertEqual(match(-1, target), False)
 
         # search empty value
-        condition = { "targetValue" : [1, 2, 3, 4, 5, 6, 7] }
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array(None, condition), False)
+        self.assertEqual(match(None, target), False)
 
         # search in an empty array
-        condition = { "targetValue" : [] }
-        self.assertEqual(self._evaluator._Evaluator__fast_match_string_in_array(1, condition), False)
+        self.assertEqual(match(1, []), False)
 
         # search for booleans
 
+    def test_string_array_targets_are_frozen_at_load(self):
+        condition = {"type": "user_field", "operator": "none", "field": "country",
+                     "targetValue": ["US", "Ca", 3]}
+        before = json.dumps(condition)
+        compiled = _Condition(condition)
+
+        self.assertEqual(compiled.match("us"), False)
+        self.assertEqual(compiled.match("CA"), False)
+        self.assertEqual(compiled.match("3"), False)
+        self.assertEqual(compiled.match("DE"), True)
+        self.assertEqual(json.dumps(condition), before)
+
+        specs = json.loads(CONFIG_SPECS_RESPONSE)
+        self._server._spec_store._process_specs(specs)
+        before = json.dumps(specs, sort_keys=True)
+        for _ in range(3):
+            self._server.check_gate(self._user, "always_on_gate")
+            self._server.get_config(self._user, "test_config")
+            self._server.get_experiment(self._user, "sample_experiment")
+        self.assertEqual(json.dumps(specs, sort_keys=True), before)
+
+    def test_user_bucket_bitmap(self):
+        targets = [0, 7, 8, 500, 999, 1000, -1]
+        any_bucket = _Condition({"type": "user_bucket", "operator": "any", "targetValue": targets})
+        none_bucket = _Condition({"type": "user_bucket", "operator": "none", "targetValue": targets})
+
+        for bucket in range(1000):
+            self.assertEqual(any_bucket.match(bucket), bucket in targets, bucket)
+            self.assertEqual(none_bucket.match(bucket), bucket not in targets, bucket)
+        self.assertFalse(any_bucket.match("7"))
+        self.assertFalse(any_bucket.match(None))
+
+    def test_current_time_settled_away_from_target(self):
+        target = 1700000000000
+        day = 24 * 60 * 60 * 1000
+        after = _Condition({"type": "current_time", "operator": "after", "targetValue": target})
+        on = _Condition({"type": "current_time", "operator": "on", "targetValue": target})
+
+        with patch("statsig.spec_compiler.datetime") as mock_datetime:
+            self.assertTrue(after.match(target + 10 * day))
+            self.assertFalse(after.match(target - 10 * day))
+            self.assertFalse(on.match(target + 10 * day))
+            mock_datetime.fromtimestamp.assert_not_called()
+
+        self.assertFalse(after.match(target - 1000))
+        self.assertTrue(after.match(target + 1000))
+        self.assertTrue(on.match(target + 1000))
+
+    def test_compiled_specs_are_compact(self):
+        spec = compile_spec(json.loads(CONFIG_SPECS_RESPONSE)["feature_gates"][0])
+        rule = spec.rules[0]
+        for compiled in (spec, rule, rule.conditions[0]):
+            self.assertFalse(hasattr(compiled, "__dict__"))
+
+        gate = _Condition({"type": "pass_gate", "targetValue": "".join(["some", "_gate"])})
+        self.assertEqual(gate.type, CONDITION_PASS_GATE)
+        self.assertIs(gate.target, "some_gate")
+        segment = _Condition({"type": "unit_id", "operator": "in_segment_list", "targetValue": "list"})
+        self.assertEqual(segment.operator, OPERATOR_IN_SEGMENT_LIST)
+        self.assertEqual(_Condition({"type": "unit_id", "operator": "IN_SEGMENT_LIST"}).operator, 0)
+
+    def test_version_compare(self):
+        def match(op, value, target):
+            return _Condition({"type": "user_field", "operator": op, "targetValue": target}).match(value)
+
+        self.assertEqual(match("version_gt", "1.2.4", "1.2.3"), True)
+        self.assertEqual(match("version_gt", "1.10", "1.9.9"), True)
+        self.assertEqual(match("version_eq", "1.2", "1.2.0.0"), True)
+        self.assertEqual(match("version_lt", "1.2", "1.2.0.1"), True)
+        self.assertEqual(match("version_gte", "2.0.0-beta", "2-rc.1"), True)
+        self.assertEqual(match("version_lte", "3.1", "3.0.9-rc"), False)
+        self.assertEqual(match("version_neq", "1.2.3", "1.2.3"), False)
+        self.assertEqual(match("version_gt", None, "1.2.3"), False)
+        # an invalid component only fails the check once the earlier components tie
+        self.assertEqual(match("version_gt", "2.x", "1.0"), True)
+        self.assertEqual(match("version_gt", "1.x", "1.0"), False)
+        self.assertEqual(match("version_neq", "abc", "1.0"), False)
+
+    def test_str_matches_compiled_once(self):
+        condition = _Condition({"type": "user_field", "operator": "str_matches", "targetValue": "^[a-z]+@statsig\\.com$"})
+        self.assertEqual(condition.match("jkw@statsig.com"), True)
+        self.assertEqual(condition.match("jkw@statsig.io"), False)
+        self.assertEqual(condition.match(None), False)
+
+        condition = _Condition({"type": "user_field", "operator": "str_matches", "targetValue": 123})
+        self.assertEqual(condition.match("a123b"), True)
+
+    def test_str_matches_invalid_pattern_flagged_at_load(self):
+        with patch("statsig.globals.logger") as logger_mock:
+            condition = _Condition({"type": "user_field", "operator": "str_matches", "targetValue": "(unclosed"})
+        logger_mock.warning.assert_called_once()
+        self.assertIn("(unclosed", logger_mock.warning.call_args[0])
+
+        with patch("re.compile") as compile_mock:
+            self.assertEqual(condition.match("(unclosed"), False)
+            self.assertEqual(condition.match("anything"), False)
+            compile_mock.assert_not_called()
+
+    def test_malformed_fields_fail_only_their_evaluations(self):
+        condition = _Condition({"type": "user_field", "operator": "any", "field": 5, "idType": ["a"],
+                                "targetValue": ["x"]})
+        self.assertRaises(TypeError, condition.get_user_field, self._user)
+        self.assertRaises(TypeError, condition.get_unit_id, self._user)
+        self.assertEqual(_Condition({"type": 7}).type, 0)
+
+        spec = compile_spec({"name": "gate", "type": "feature_gate", "salt": "s", "enabled": True,
+                             "defaultValue": False, "rules": [{"name": "r", "id": "r", "salt": "r", "idType": 1,
+                                                               "passPercentage": 100, "returnValue": True,
+                                                               "conditions": [{"type": "public"}]}]})
+        self.assertRaises(TypeError, spec.rules[0].get_unit_id, self._user)
+
 if __name__ == "__main__":
     unittest.main()
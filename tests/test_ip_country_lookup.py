@@ -0,0 +1,48 @@
+import unittest
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+
+SPECS = '{"feature_gates":[{"name":"us_gate","type":"feature_gate","salt":"s","enabled":true,' \
+        '"defaultValue":false,"rules":[{"name":"r","id":"r","salt":"r","passPercentage":100,"returnValue":true,' \
+        '"conditions":[{"type":"ip_based","operator":"any","field":"country","targetValue":["US"]}]}]},' \
+        '{"name":"public_gate","type":"feature_gate","salt":"s","enabled":true,' \
+        '"defaultValue":false,"rules":[{"name":"r","id":"r","salt":"r","passPercentage":100,"returnValue":true,' \
+        '"conditions":[{"type":"public"}]}]}],' \
+        '"dynamic_configs":[],"layer_configs":[],"has_updates":true,"time":1}'
+
+
+class TestIPCountryLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(local_mode=True, bootstrap_values=SPECS))
+        self.evaluator = self.server._evaluator
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_country_table_loaded_on_first_use(self):
+        self.assertIsNone(self.evaluator._country_lookup)
+
+        self.assertTrue(self.server.check_gate(StatsigUser("u"), "public_gate"))
+        self.assertIsNone(self.evaluator._country_lookup)
+
+        self.assertTrue(self.server.check_gate(StatsigUser("u", ip="24.1.2.3"), "us_gate"))
+        self.assertIsNotNone(self.evaluator._country_lookup)
+
+    def test_repeated_ip_uses_cached_country(self):
+        cache = self.evaluator._ip_country_cache
+        for _ in range(3):
+            self.assertTrue(self.server.check_gate(StatsigUser("u", ip="24.1.2.3"), "us_gate"))
+            self.assertFalse(self.server.check_gate(StatsigUser("u", ip="77.1.1.1"), "us_gate"))
+
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 4)
+
+    def test_user_country_skips_ip_lookup(self):
+        self.assertTrue(self.server.check_gate(StatsigUser("u", ip="77.1.1.1", country="US"), "us_gate"))
+        self.assertIsNone(self.evaluator._country_lookup)
+
+
+if __name__ == '__main__':
+    unittest.main()
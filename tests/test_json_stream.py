@@ -0,0 +1,76 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from statsig import StatsigOptions, StatsigServer
+from statsig.json_stream import load_object_stream
+from network_stub import NetworkStub
+
+with open(os.path.join(os.path.abspath(os.path.dirname(__file__)), '../testdata/download_config_specs.json')) as r:
+    CONFIG_SPECS_TEXT = r.read()
+
+_api_override = "http://json-stream-test"
+_network_stub = NetworkStub(_api_override)
+
+
+def _chunks(text, size):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJsonStream(unittest.TestCase):
+
+    def test_matches_json_loads_for_any_chunking(self):
+        docs = [
+            CONFIG_SPECS_TEXT,
+            '{"a": [1, -2.5e3, "x\\u00e9\\"]", {"b": [null, true, false]}], "c": {"d": []}, "e": -1.5}',
+            ' { } ', '[]', '[1, {"a": "ü😀"}]', '"text"', '-12.5E-3', 'null',
+        ]
+        for doc in docs:
+            for size in (1, 2, 3, 7, 64, 1 << 20):
+                with self.subTest(doc=doc[:20], size=size):
+                    self.assertEqual(load_object_stream(_chunks(doc, size)), json.loads(doc))
+
+    def test_invalid_documents_raise(self):
+        for doc in ('', '{', '{"a": [1, 2}', '{"a": 1,}', '{"a": 1} {}', '{1: 2}', '[1] x', '{"a": -}'):
+            for size in (1, 4, 64):
+                with self.subTest(doc=doc, size=size), self.assertRaises(ValueError):
+                    load_object_stream(_chunks(doc, size))
+
+    @patch('requests.request', side_effect=_network_stub.mock)
+    def test_specs_streamed_from_response(self, mock_request):
+        _network_stub.reset()
+        _network_stub.stub_request_with_value("download_config_specs/.*", 200, CONFIG_SPECS_TEXT)
+        _network_stub.stub_request_with_value("get_id_lists", 200, {})
+        server = StatsigServer()
+        server.initialize("secret-key", StatsigOptions(
+            api=_api_override, disable_diagnostics=True, rulesets_sync_interval=100000))
+        try:
+            dcs_calls = [c for c in mock_request.call_args_list if "download_config_specs" in c.args[1]]
+            self.assertTrue(dcs_calls)
+            self.assertTrue(all(c.kwargs["stream"] for c in dcs_calls))
+            expected = json.loads(CONFIG_SPECS_TEXT)
+            store = server._spec_store
+            self.assertEqual(store.last_update_time, expected["time"])
+            self.assertEqual(sorted(store.get_all_gates()), sorted(g["name"] for g in expected["feature_gates"]))
+
+            def broken(*args, **kwargs):
+                response = NetworkStub.StubResponse(200, CONFIG_SPECS_TEXT)
+
+                def iter_content(chunk_size=1, decode_unicode=False):
+                    yield CONFIG_SPECS_TEXT[:100].encode("utf-8")
+                    raise requests.exceptions.ChunkedEncodingError("connection reset")
+                response.iter_content = iter_content
+                return response
+
+            with patch('requests.request', side_effect=broken):
+                self.assertIsNone(server._network.download_config_specs(expected["time"]))
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
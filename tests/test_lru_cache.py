@@ -0,0 +1,80 @@
+import threading
+import unittest
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.lru_cache import _LRUCache
+
+UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) " \
+     "Chrome/117.0.0.0 Safari/537.36"
+
+SPECS = '{"feature_gates":[{"name":"mac_gate","type":"feature_gate","salt":"s","enabled":true,' \
+        '"defaultValue":false,"rules":[{"name":"r","id":"r","salt":"r","passPercentage":100,"returnValue":true,' \
+        '"conditions":[{"type":"ua_based","operator":"any","field":"os_name","targetValue":["Mac OS X"]},' \
+        '{"type":"ua_based","operator":"version_gte","field":"browser_version","targetValue":"100"}]}]}],' \
+        '"dynamic_configs":[],"layer_configs":[],"has_updates":true,"time":1}'
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = _LRUCache(2)
+        cache.get_or_compute("a", str.upper)
+        cache.get_or_compute("b", str.upper)
+        cache.get_or_compute("a", str.upper)
+        cache.get_or_compute("c", str.upper)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 3)
+
+        calls = []
+        cache.get_or_compute("a", lambda k: calls.append(k) or k)
+        self.assertEqual(calls, [])
+        cache.get_or_compute("b", lambda k: calls.append(k) or k)
+        self.assertEqual(calls, ["b"])
+
+    def test_caches_none_values(self):
+        cache = _LRUCache(10)
+        self.assertIsNone(cache.get_or_compute("x", lambda _: None))
+        self.assertIsNone(cache.get_or_compute("x", lambda _: "recomputed"))
+        self.assertEqual(cache.hits, 1)
+
+    def test_disabled_with_zero_size(self):
+        cache = _LRUCache(0)
+        cache.get_or_compute("a", str.upper)
+        cache.get_or_compute("a", str.upper)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.misses, 2)
+
+    def test_concurrent_access_stays_bounded(self):
+        cache = _LRUCache(50)
+
+        def work(offset):
+            for i in range(500):
+                self.assertEqual(cache.get_or_compute((i + offset) % 80, lambda k: k * 2), ((i + offset) % 80) * 2)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertLessEqual(len(cache), 50)
+        self.assertEqual(cache.hits + cache.misses, 8 * 500)
+
+    def test_user_agent_parsed_once_per_string(self):
+        server = StatsigServer()
+        server.initialize("secret-key", StatsigOptions(
+            local_mode=True, bootstrap_values=SPECS, user_agent_cache_size=10))
+        cache = server._evaluator._user_agent_cache
+
+        for _ in range(5):
+            self.assertTrue(server.check_gate(StatsigUser("u", user_agent=UA), "mac_gate"))
+
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 9)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.evaluation_context import _EvaluationContext
+from statsig.evaluator import _Evaluator
+from spec_helpers import gate, rule, specs
+
+
+def _gate(name, conditions):
+    return gate(name, [rule(name + "_rule", conditions)])
+
+
+def _gate_condition(cond_type, target):
+    return {"type": cond_type, "targetValue": target, "operator": None, "field": None, "additionalValues": {}}
+
+
+SPECS = json.dumps(specs([
+    _gate("holdout", [{"type": "user_field", "operator": "any", "field": "email",
+                       "targetValue": ["a@statsig.com"], "additionalValues": {}}]),
+    _gate("pass_holdout", [_gate_condition("pass_gate", "holdout")]),
+    _gate("fail_holdout", [_gate_condition("fail_gate", "holdout")]),
+    _gate("multi_holdout", [_gate_condition("multi_pass_gate", ["holdout"])]),
+    _gate("nested_twice", [_gate_condition("pass_gate", "pass_holdout"),
+                           _gate_condition("pass_gate", "holdout")]),
+]))
+
+
+class TestNestedGateMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(local_mode=True, bootstrap_values=SPECS))
+        self.evaluator = self.server._evaluator
+        self.original_evaluate = _Evaluator._Evaluator__evaluate
+        self.evaluated = []
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def _count_evaluations(self):
+        def evaluate(evaluator, context, config, end_result, is_nested=False):
+            self.evaluated.append(config.name)
+            return self.original_evaluate(evaluator, context, config, end_result, is_nested)
+
+        return patch.object(_Evaluator, "_Evaluator__evaluate", evaluate)
+
+    def test_shared_gate_evaluated_once_per_call(self):
+        user = StatsigUser("u", email="a@statsig.com")
+        with self._count_evaluations():
+            result = self.server.evaluate_all(user)
+
+        self.assertEqual(self.evaluated.count("holdout"), 2)  # the top-level check plus one nested
+        self.assertEqual(self.evaluated.count("pass_holdout"), 2)
+        self.assertEqual(result["feature_gates"], {
+            "holdout": {"value": True, "rule_id": "holdout_rule"},
+            "pass_holdout": {"value": True, "rule_id": "pass_holdout_rule"},
+            "fail_holdout": {"value": False, "rule_id": "default"},
+            "multi_holdout": {"value": True, "rule_id": "multi_holdout_rule"},
+            "nested_twice": {"value": True, "rule_id": "nested_twice_rule"},
+        })
+
+    def test_memoized_results_match_fresh_evaluation(self):
+        for user in [StatsigUser("u", email="a@statsig.com"), StatsigUser("v")]:
+            fresh = {
+                name: self.evaluator.check_gate(user, name) for name in self.server._spec_store.get_all_gates()
+            }
+            with self._count_evaluations():
+                self.server.evaluate_all(user)
+            self.assertEqual(self.evaluated.count("holdout"), 2)
+            self.evaluated.clear()
+
+            context = _EvaluationContext(user)
+            for name in ["nested_twice", "fail_holdout", "multi_holdout", "pass_holdout"]:
+                result = self.evaluator.check_gate(user, name, context)
+                self.assertEqual(result.boolean_value, fresh[name].boolean_value)
+                self.assertEqual(result.rule_id, fresh[name].rule_id)
+                self.assertEqual(result.secondary_exposures, fresh[name].secondary_exposures)
+
+    def test_overrides_are_not_memoized(self):
+        user = StatsigUser("u", email="a@statsig.com")
+        self.evaluator.override_gate("holdout", False)
+        context = _EvaluationContext(user)
+
+        self.assertFalse(self.evaluator.check_gate(user, "pass_holdout", context).boolean_value)
+        self.assertTrue(self.evaluator.check_gate(user, "fail_holdout", context).boolean_value)
+        self.assertEqual(context.nested_gates, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.config_evaluation import _EMPTY, _ConfigEvaluation
+from statsig.evaluation_context import _EvaluationContext
+from spec_helpers import PUBLIC, config, delegate_rule, gate, layer, rule, specs
+
+
+def _gate(name, conditions):
+    return gate(name, [rule(name, conditions)])
+
+
+SPECS = json.dumps(specs(
+    [
+        _gate("public", [PUBLIC]),
+        _gate("on_public", [{"type": "pass_gate", "targetValue": "public"}]),
+        _gate("multi_public", [{"type": "multi_pass_gate", "targetValue": ["public"]}]),
+    ],
+    [config("experiment", {"a": 1})],
+    [layer("layer", {"b": 2}, [delegate_rule("r", "experiment")])],
+    layers={"layer": ["experiment"]}))
+
+
+class TestResultAllocations(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(local_mode=True, bootstrap_values=SPECS))
+        self.evaluator = self.server._evaluator
+        self.user = StatsigUser("u")
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_results_are_slotted(self):
+        results = [
+            _ConfigEvaluation(),
+            self.server.get_feature_gate(self.user, "public"),
+            self.server.get_config(self.user, "experiment"),
+            self.server.get_layer(self.user, "layer"),
+        ]
+        for result in results:
+            self.assertFalse(hasattr(result, "__dict__"), type(result))
+
+    def test_empty_exposures_shared_until_appended(self):
+        public = self.evaluator.check_gate(self.user, "public")
+        self.assertIs(public.secondary_exposures, _EMPTY)
+        self.assertIs(public.undelegated_secondary_exposures, _EMPTY)
+        self.assertIs(public.explicit_parameters, _EMPTY)
+
+        for gate in ["on_public", "multi_public"]:
+            nested = self.evaluator.check_gate(self.user, gate)
+            self.assertEqual(nested.secondary_exposures, [{"gate": "public", "gateValue": "true", "ruleID": "public"}])
+            self.assertEqual(nested.undelegated_secondary_exposures, nested.secondary_exposures)
+
+        layer = self.evaluator.get_layer(self.user, "layer")
+        self.assertEqual(layer.allocated_experiment, "experiment")
+        self.assertEqual(layer.secondary_exposures, [])
+        self.server.evaluate_all(self.user)
+        self.server.get_client_initialize_response(self.user)
+        self.assertEqual(_EMPTY, [])
+
+    def test_exposures_not_built_when_not_logged(self):
+        for gate in ["on_public", "multi_public"]:
+            context = _EvaluationContext(self.user, track_exposures=False)
+            result = self.evaluator.check_gate(self.user, gate, context)
+            self.assertTrue(result.boolean_value)
+            self.assertEqual(result.rule_id, gate)
+            self.assertIs(result.secondary_exposures, _EMPTY)
+            self.assertIs(result.undelegated_secondary_exposures, _EMPTY)
+
+        context = _EvaluationContext(self.user, track_exposures=False)
+        layer = self.evaluator.get_layer(self.user, "layer", context)
+        self.assertEqual(layer.allocated_experiment, "experiment")
+        self.assertIs(layer.undelegated_secondary_exposures, _EMPTY)
+
+        with patch.object(self.evaluator, "check_gate", wraps=self.evaluator.check_gate) as check_gate, \
+                patch.object(self.server._logger, "log_gate_exposure") as log_gate_exposure:
+            self.assertTrue(self.server.check_gate(self.user, "on_public", log_exposure=False))
+            self.assertTrue(self.server.check_gate(self.user, "on_public"))
+        self.assertEqual([c.args[2].track_exposures for c in check_gate.call_args_list], [False, True])
+        self.assertEqual(log_gate_exposure.call_args.args[4], [{"gate": "public", "gateValue": "true", "ruleID": "public"}])
+        self.assertEqual(self.server.evaluate_all(self.user)["feature_gates"]["multi_public"],
+                         {"value": True, "rule_id": "multi_public"})
+        self.assertEqual(_EMPTY, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
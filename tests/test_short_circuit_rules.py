@@ -0,0 +1,90 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.evaluator import _Evaluator
+from statsig.spec_compiler import CONDITION_PASS_GATE, CONDITION_UA_BASED
+from spec_helpers import PUBLIC, gate, rule, specs
+
+with open(os.path.join(os.path.abspath(os.path.dirname(__file__)), '../testdata/download_config_specs.json')) as r:
+    CONFIG_SPECS_RESPONSE = r.read()
+
+UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) " \
+     "Chrome/117.0.0.0 Safari/537.36"
+
+EXPENSIVE_RULE_SPECS = json.dumps(specs([
+    gate("holdout", [rule("all", [PUBLIC])], entity="holdout"),
+    gate("expensive", [rule("r", [
+        {"type": "user_field", "operator": "any", "field": "email", "targetValue": ["a@statsig.com"]},
+        {"type": "ua_based", "operator": "version_gte", "field": "browser_version", "targetValue": "100"},
+        {"type": "user_field", "operator": "str_matches", "field": "email", "targetValue": "@statsig"},
+        {"type": "pass_gate", "targetValue": "holdout"},
+    ])]),
+]))
+
+
+class TestShortCircuitRules(unittest.TestCase):
+
+    def _start(self, specs, short_circuit_rules):
+        server = StatsigServer()
+        server.initialize("secret-key", StatsigOptions(
+            local_mode=True, bootstrap_values=specs, short_circuit_rules=short_circuit_rules))
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _evaluate_counting_conditions(self, server, user):
+        evaluated = []
+
+        def counting(original):
+            def evaluate_condition(evaluator, context, condition, *args):
+                evaluated.append(condition.type)
+                return original(evaluator, context, condition, *args)
+            return evaluate_condition
+
+        with patch.object(_Evaluator, "_Evaluator__evaluate_condition",
+                          counting(_Evaluator._Evaluator__evaluate_condition)), \
+                patch.object(_Evaluator, "_Evaluator__evaluate_gate_condition",
+                             counting(_Evaluator._Evaluator__evaluate_gate_condition)):
+            return server.evaluate_all(user), evaluated
+
+    def test_results_unchanged_on_download_config_specs(self):
+        full = self._start(CONFIG_SPECS_RESPONSE, False)
+        short = self._start(CONFIG_SPECS_RESPONSE, True)
+        for i in range(50):
+            user = StatsigUser(f"user_{i}", email="x@statsig.com" if i % 3 == 0 else f"u{i}@mail.com",
+                               custom_ids={"stableID": str(i)})
+            full_result, full_conditions = self._evaluate_counting_conditions(full, user)
+            short_result, short_conditions = self._evaluate_counting_conditions(short, user)
+            self.assertEqual(full_result, short_result)
+            self.assertLessEqual(len(short_conditions), len(full_conditions))
+
+            for name in full._spec_store.get_all_configs():
+                expected = full._evaluator.get_config(user, name)
+                actual = short._evaluator.get_config(user, name)
+                self.assertEqual(actual.secondary_exposures, expected.secondary_exposures)
+                self.assertEqual(actual.undelegated_secondary_exposures, expected.undelegated_secondary_exposures)
+
+    def test_skips_conditions_after_failure_but_keeps_gate_exposures(self):
+        user = StatsigUser("u", email="b@statsig.com", user_agent=UA)
+        full = self._start(EXPENSIVE_RULE_SPECS, False)
+        short = self._start(EXPENSIVE_RULE_SPECS, True)
+
+        _, full_conditions = self._evaluate_counting_conditions(full, user)
+        _, short_conditions = self._evaluate_counting_conditions(short, user)
+        self.assertIn(CONDITION_UA_BASED, full_conditions)
+        self.assertNotIn(CONDITION_UA_BASED, short_conditions)
+        self.assertIn(CONDITION_PASS_GATE, short_conditions)
+
+        expected = full._evaluator.check_gate(user, "expensive")
+        actual = short._evaluator.check_gate(user, "expensive")
+        self.assertFalse(actual.boolean_value)
+        self.assertEqual(actual.rule_id, expected.rule_id)
+        self.assertEqual(actual.secondary_exposures,
+                         [{"gate": "holdout", "gateValue": "true", "ruleID": "all"}])
+        self.assertEqual(actual.secondary_exposures, expected.secondary_exposures)
+
+
+if __name__ == '__main__':
+    unittest.main()
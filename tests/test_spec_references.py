@@ -0,0 +1,107 @@
+import json
+import sys
+import unittest
+from unittest.mock import patch
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.spec_store import _SpecSnapshot
+from spec_helpers import PUBLIC, config, delegate_rule, gate, layer, rule, specs
+
+
+def _gate(name, conditions, first_rule_conditions=None):
+    rules = [rule(name + "_rule", conditions)]
+    if first_rule_conditions is not None:
+        rules.insert(0, rule(name + "_first", first_rule_conditions))
+    return gate(name, rules)
+
+
+def _pass_gate(target):
+    return {"type": "pass_gate", "targetValue": target}
+
+
+EMPLOYEE = {"type": "user_field", "operator": "str_ends_with_any", "field": "email", "targetValue": ["@statsig.com"]}
+
+SPECS = json.dumps(specs(
+    [
+        _gate("base", [EMPLOYEE]),
+        _gate("on_base", [_pass_gate("base"), {"type": "multi_pass_gate", "targetValue": ["missing", "base"]}]),
+        _gate("ping", [_pass_gate("pong")]),
+        _gate("pong", [_pass_gate("ping")]),
+        _gate("reaches_cycle", [_pass_gate("ping")]),
+        # the cycle is only reached by users that fail the first rule
+        _gate("employees_skip_cycle", [_pass_gate("employees_skip_cycle")], first_rule_conditions=[EMPLOYEE]),
+    ],
+    [config("experiment", {"a": 1}, hasSharedParams=True)],
+    [layer("layer", {"b": 2}, [delegate_rule("r", "experiment")])],
+    layers={"layer": ["experiment"]}))
+
+
+class TestSpecReferences(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StatsigServer()
+        with patch("statsig.globals.logger") as logger:
+            self.server.initialize("secret-key", StatsigOptions(local_mode=True, bootstrap_values=SPECS))
+        self.logger = logger
+        self.store = self.server._spec_store
+        self.evaluator = self.server._evaluator
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_references_resolved_at_load(self):
+        on_base = self.store.get_gate("on_base").rules[0]
+        self.assertIs(on_base.conditions[0].target_spec, self.store.get_gate("base"))
+        self.assertEqual(on_base.conditions[1].target_spec, [None, self.store.get_gate("base")])
+        self.assertIs(self.store.get_layer("layer").rules[0].delegate_spec, self.store.get_config("experiment"))
+        self.assertIs(self.store.get_config("experiment").layer, self.store.get_layer("layer"))
+        self.logger.debug.assert_any_call("Specs reference missing gates or configs: ['missing']")
+
+        user = StatsigUser("u", email="a@statsig.com")
+        with patch.object(_SpecSnapshot, "get_gate", autospec=True, side_effect=_SpecSnapshot.get_gate) as get_gate:
+            result = self.evaluator.check_gate(user, "on_base")
+        self.assertTrue(result.boolean_value)
+        # only the top-level name and the missing gate are looked up
+        self.assertEqual([c.args[1] for c in get_gate.call_args_list], ["on_base", "missing"])
+
+    def test_cycles_flagged_at_load(self):
+        flagged = sorted(name for name, spec in self.store.get_all_gates().items() if spec.in_cycle)
+        self.assertEqual(flagged, ["employees_skip_cycle", "ping", "pong"])
+        self.logger.warning.assert_called_once_with(
+            "Specs reference each other in a cycle and fail to evaluate wherever it is reached: "
+            "['employees_skip_cycle', 'ping', 'pong']")
+
+    def test_cycles_fail_without_deep_recursion(self):
+        user = StatsigUser("u", email="a@b.com")
+        for gate in ["ping", "reaches_cycle", "employees_skip_cycle"]:
+            with self.assertRaisesRegex(RecursionError, "Circular reference"):
+                self.evaluator.check_gate(user, gate)
+            self.assertFalse(self.server.check_gate(user, gate))
+
+        employee = StatsigUser("e", email="e@statsig.com")
+        self.assertTrue(self.server.check_gate(employee, "employees_skip_cycle"))
+
+    def test_deep_gate_chains_evaluate_without_recursion(self):
+        depth = sys.getrecursionlimit() * 2
+        gates = [_gate("chain_0", [EMPLOYEE])]
+        gates += [_gate(f"chain_{i}", [_pass_gate(f"chain_{i - 1}")]) for i in range(1, depth)]
+        gates.append(_gate("chain_cycle", [_pass_gate(f"chain_{depth - 1}"), _pass_gate("ping")]))
+        specs = json.loads(SPECS)
+        specs["feature_gates"] += gates
+        self.store._process_specs(specs)
+
+        top = f"chain_{depth - 1}"
+        employee = self.evaluator.check_gate(StatsigUser("e", email="e@statsig.com"), top)
+        self.assertTrue(employee.boolean_value)
+        self.assertEqual(employee.rule_id, top + "_rule")
+        self.assertEqual(len(employee.secondary_exposures), depth - 1)
+        self.assertEqual(employee.secondary_exposures[0], {"gate": "chain_0", "gateValue": "true",
+                                                           "ruleID": "chain_0_rule"})
+        self.assertFalse(self.evaluator.check_gate(StatsigUser("u", email="a@b.com"), top).boolean_value)
+
+        with self.assertRaisesRegex(RecursionError, "Circular reference to ping"):
+            self.evaluator.check_gate(StatsigUser("e", email="e@statsig.com"), "chain_cycle")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import unittest
+
+from statsig import StatsigOptions, StatsigServer, StatsigUser
+from statsig.evaluation_context import _EvaluationContext
+from spec_helpers import PUBLIC, config, delegate_rule, gate, layer, rule, specs
+
+
+def _specs(version, time):
+    return specs(
+        [gate("gate", [rule(f"gate_{version}", [PUBLIC])])],
+        [config("experiment", {"version": version})],
+        [layer("layer", {}, [delegate_rule(f"layer_{version}", "experiment")])],
+        time=time, layers={"layer": ["experiment"]})
+
+
+class TestSpecSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StatsigServer()
+        self.server.initialize("secret-key", StatsigOptions(local_mode=True, bootstrap_values=json.dumps(_specs(1, 10))))
+        self.store = self.server._spec_store
+        self.evaluator = self.server._evaluator
+        self.user = StatsigUser("u")
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_sync_swaps_in_a_new_snapshot(self):
+        old = self.store.get_snapshot()
+        old_gates = old.get_all_gates()
+        self.assertTrue(self.store._process_specs(_specs(2, 20)))
+
+        new = self.store.get_snapshot()
+        self.assertIsNot(new, old)
+        self.assertEqual(self.store.last_update_time, 20)
+        self.assertEqual(old.last_update_time, 10)
+        self.assertIs(old.get_all_gates(), old_gates)
+        self.assertEqual(old.get_gate("gate").rules[0].id, "gate_1")
+        self.assertEqual(new.get_gate("gate").rules[0].id, "gate_2")
+
+        self.assertFalse(self.store._process_specs(_specs(3, 15)))
+        self.assertIs(self.store.get_snapshot(), new)
+
+    def test_unchanged_specs_reused_across_syncs(self):
+        old = self.store.get_snapshot()
+        self.assertTrue(self.store._process_specs(_specs(1, 20)))
+        new = self.store.get_snapshot()
+        self.assertIs(new.get_gate("gate"), old.get_gate("gate"))
+        self.assertIs(new.get_config("experiment"), old.get_config("experiment"))
+        self.assertIs(new.get_layer("layer"), old.get_layer("layer"))
+
+        # the layer links to the changed experiment, so it is rebuilt with it
+        changed = _specs(1, 30)
+        changed["dynamic_configs"][0]["defaultValue"] = {"version": 2}
+        self.assertTrue(self.store._process_specs(changed))
+        latest = self.store.get_snapshot()
+        self.assertIs(latest.get_gate("gate"), old.get_gate("gate"))
+        self.assertIsNot(latest.get_config("experiment"), old.get_config("experiment"))
+        self.assertIsNot(latest.get_layer("layer"), old.get_layer("layer"))
+        self.assertIs(latest.get_layer("layer").rules[0].delegate_spec, latest.get_config("experiment"))
+        self.assertIs(latest.get_config("experiment").layer, latest.get_layer("layer"))
+        self.assertIs(old.get_layer("layer").rules[0].delegate_spec, old.get_config("experiment"))
+        self.assertEqual(self.evaluator.get_layer(self.user, "layer").json_value, {"version": 2})
+
+        # unlinking the experiment from its layer rebuilds it and the layer delegating to it
+        changed["layers"] = {}
+        changed["time"] = 40
+        self.assertTrue(self.store._process_specs(changed))
+        self.assertIs(self.store.get_gate("gate"), old.get_gate("gate"))
+        self.assertIsNone(self.store.get_config("experiment").layer)
+        self.assertIs(self.store.get_layer("layer").rules[0].delegate_spec, self.store.get_config("experiment"))
+        self.assertIs(latest.get_config("experiment").layer, latest.get_layer("layer"))
+
+    def test_call_reads_one_snapshot(self):
+        context = _EvaluationContext(self.user)
+        self.assertEqual(self.evaluator.check_gate(self.user, "gate", context).rule_id, "gate_1")
+        # a sync landing between lookups of the same call is not seen by it
+        self.store._process_specs(_specs(2, 20))
+
+        layer = self.evaluator.get_layer(self.user, "layer", context)
+        self.assertEqual(layer.allocated_experiment, "experiment")
+        self.assertEqual(layer.json_value, {"version": 1})
+        self.assertEqual(layer.evaluation_details.config_sync_time, 10)
+
+        layer = self.evaluator.get_layer(self.user, "layer")
+        self.assertEqual(layer.json_value, {"version": 2})
+        self.assertEqual(layer.evaluation_details.config_sync_time, 20)
+        self.assertEqual(self.server.evaluate_all(self.user)["feature_gates"]["gate"],
+                         {"value": True, "rule_id": "gate_2"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -136,7 +136,7 @@ class TestStatsigErrorBoundaryUsage(unittest.TestCase):
 
         self.assertEqual(len(_get_requests(self._instance)), 1)
         trace = _get_requests(self._instance)[0]['body']['info']
-        self.assertIn('object has no attribute \'get_all_gates\'\n', trace)
+        self.assertIn('object has no attribute \'get_snapshot\'\n', trace)
         self.assertEqual(res, {
             "feature_gates": {}, "dynamic_configs": {}
         })
@@ -47,6 +47,25 @@ class TestStatsigUser(unittest.TestCase):
         user = StatsigUser(123)
         self.assertEqual(user.user_id, '123')
 
+    def test_normalized_copy_reused_until_changed(self):
+        environment = {"tier": "staging"}
+        user = StatsigUser("test", custom_ids={"org": 1})
+        normalized = user._normalized(environment)
+        self.assertIsNot(normalized, user)
+        self.assertEqual(normalized._statsig_environment, environment)
+        self.assertIsNone(user._statsig_environment)
+        self.assertEqual(user, StatsigUser("test", custom_ids={"org": "1"}))
+        self.assertIs(user._normalized(environment), normalized)
+
+        user.email = "a@statsig.com"
+        renormalized = user._normalized(environment)
+        self.assertIsNot(renormalized, normalized)
+        self.assertEqual(renormalized.email, "a@statsig.com")
+
+        user.custom_ids["team"] = "sdk"
+        self.assertEqual(user._normalized(environment).custom_ids, {"org": "1", "team": "sdk"})
+        self.assertIsNone(user._normalized()._statsig_environment)
+
     def test_all(self):
         id = uuid4()
         ua_string = 'Mozilla/5.0 (iPhone; CPU iPhone OS 5_1 like Mac OS X) AppleWebKit/534.46 (KHTML, like Gecko) Version/5.1 Mobile/9B179 Safari/7534.48.3'
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from statsig.spec_compiler import _Condition
+from statsig.string_matchers import _AhoCorasick, _PrefixTrie
+
+
+class TestStringMatchers(unittest.TestCase):
+
+    def test_matchers_agree_with_builtins(self):
+        rand = random.Random(5)
+
+        def random_string(min_len, max_len):
+            return "".join(rand.choice("ab.@") for _ in range(rand.randint(min_len, max_len)))
+
+        for _ in range(200):
+            targets = tuple(random_string(1, 4) for _ in range(rand.randint(1, 10)))
+            prefixes = _PrefixTrie(targets)
+            suffixes = _PrefixTrie(targets, reverse=True)
+            contains = _AhoCorasick(targets)
+            for _ in range(50):
+                value = random_string(0, 12)
+                self.assertEqual(prefixes.matches(value), value.startswith(targets), (targets, value))
+                self.assertEqual(suffixes.matches(value), value.endswith(targets), (targets, value))
+                self.assertEqual(contains.matches(value), any(t in value for t in targets), (targets, value))
+
+    def test_empty_target_matches_everything(self):
+        self.assertTrue(_PrefixTrie(["", "x"]).matches("abc"))
+        self.assertTrue(_PrefixTrie([""], reverse=True).matches(""))
+        self.assertTrue(_AhoCorasick(["", "x"]).matches("abc"))
+
+    def test_large_segment_conditions(self):
+        domains = ["@domain%d.com" % i for i in range(2000)]
+        prefixes = ["https://site%d.example/" % i for i in range(2000)]
+
+        def condition(op, target):
+            return _Condition({"type": "user_field", "operator": op, "field": "email", "targetValue": target})
+
+        ends_with = condition("str_ends_with_any", domains)
+        self.assertTrue(ends_with.match("Someone@DOMAIN1999.com"))
+        self.assertFalse(ends_with.match("someone@domain2000.com"))
+
+        starts_with = condition("str_starts_with_any", prefixes)
+        self.assertTrue(starts_with.match("HTTPS://site7.example/path"))
+        self.assertFalse(starts_with.match("http://site7.example/path"))
+
+        contains = condition("str_contains_any", ["domain%d." % i for i in range(2000)])
+        self.assertTrue(contains.match("a@DOMAIN42.com"))
+        self.assertFalse(contains.match("a@domain.com"))
+
+        contains_none = condition("str_contains_none", ["domain%d." % i for i in range(2000)])
+        self.assertFalse(contains_none.match("a@domain42.com"))
+        self.assertTrue(contains_none.match(12345))
+        self.assertTrue(contains_none.match(None))
+
+
+if __name__ == '__main__':
+    unittest.main()